@@ -0,0 +1,132 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+try:
+    from unittest import mock
+except ImportError:
+    import unittest.mock as mock
+
+from copyright_inventory import Inventory
+from copyright_inventory import is_under
+from copyright_inventory import scan_file
+
+
+class TestScanFile(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def _write(self, name, contents):
+        filename = os.path.join(self.tmpdir, name)
+        with open(filename, "w") as fp:
+            fp.write(contents)
+        return filename
+
+    def testAnyHolder(self):
+        filename = self._write(
+            "foo.py",
+            "#!/usr/bin/env python\n"
+            "# Copyright 2014-2016 Foo Corp, Inc.\n"
+            ";; Copyright (c) 2010, 2012 Someone Else\n",
+        )
+        signature, found = scan_file(filename)
+        self.assertIsNotNone(signature)
+        self.assertEqual(
+            [
+                (2, "Foo Corp, Inc.", "2014-2016", [(2014, 2016)], "#"),
+                (3, "Someone Else", "2010, 2012", [(2010, 2010), (2012, 2012)], ";;"),
+            ],
+            found,
+        )
+
+    def testUncommented(self):
+        filename = self._write("README.md", "Copyright 2015 Foo Corp, Inc.\n")
+        _, found = scan_file(filename, commented=False)
+        self.assertEqual([(1, "Foo Corp, Inc.", "2015", [(2015, 2015)], "")], found)
+
+    def testOutsideHeader(self):
+        filename = self._write("foo.py", "\n" * 10 + "# Copyright 2015 Foo Corp, Inc.\n")
+        self.assertEqual([], scan_file(filename)[1])
+
+    def testMissing(self):
+        self.assertEqual((None, []), scan_file(os.path.join(self.tmpdir, "nope")))
+
+
+class TestInventory(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.src = os.path.join(self.tmpdir, "src")
+        os.mkdir(self.src)
+        self.inventory = Inventory(os.path.join(self.tmpdir, "db.sqlite"))
+
+    def tearDown(self):
+        self.inventory.close()
+        shutil.rmtree(self.tmpdir)
+
+    def _write(self, name, contents, mtime_ns=None):
+        filename = os.path.join(self.src, name)
+        with open(filename, "w") as fp:
+            fp.write(contents)
+        if mtime_ns is not None:
+            os.utime(filename, ns=(mtime_ns, mtime_ns))
+
+    def testIncremental(self):
+        self._write("a.py", "# Copyright 2015 Foo Corp, Inc.\n")
+        self._write("b.py", "# Copyright 2010-2012 Bar\n")
+        self._write("c.py", "print('no header')\n")
+
+        self.assertEqual(3, self.inventory.update([self.src], jobs=1))
+        self.assertEqual(
+            [("Bar", "#", 1, 2010, 2012), ("Foo Corp, Inc.", "#", 1, 2015, 2015)],
+            self.inventory.summary(),
+        )
+        self.assertEqual([os.path.join(self.src, "c.py")], self.inventory.missing())
+
+        # nothing changed, nothing is rescanned
+        self.assertEqual(0, self.inventory.update([self.src], jobs=1))
+
+        self._write("a.py", "# Copyright 2015-2016 Foo Corp, Inc.\n", mtime_ns=10**18)
+        os.unlink(os.path.join(self.src, "b.py"))
+        self.assertEqual(1, self.inventory.update([self.src], jobs=1))
+        self.assertEqual([("Foo Corp, Inc.", "#", 1, 2015, 2016)], self.inventory.summary())
+
+    def testDeletedPathNamed(self):
+        self._write("a.py", "# Copyright 2015 Foo Corp, Inc.\n")
+        filename = os.path.join(self.src, "a.py")
+        self.inventory.update([filename], jobs=1)
+        self.assertEqual(1, len(self.inventory.summary()))
+
+        os.unlink(filename)
+        self.inventory.update([filename], jobs=1)
+        self.assertEqual([], self.inventory.summary())
+        self.assertEqual([], self.inventory.missing())
+
+    def testVanishedBeforeScan(self):
+        self._write("a.py", "# Copyright 2015 Foo Corp, Inc.\n")
+        self.inventory.update([self.src], jobs=1)
+
+        self._write("a.py", "# Copyright 2016 Foo Corp, Inc.\n", mtime_ns=10**18)
+        with mock.patch("copyright_inventory.scan_file", return_value=(None, [])):
+            self.inventory.update([self.src], jobs=1)
+        self.assertEqual([], self.inventory.summary())
+        self.assertEqual([], self.inventory.missing())
+
+    def testParallel(self):
+        for i in range(20):
+            self._write(f"{i}.py", f"# Copyright {2000 + i} Foo Corp, Inc.\n")
+
+        self.assertEqual(20, self.inventory.update([self.src], jobs=2))
+        self.assertEqual([("Foo Corp, Inc.", "#", 20, 2000, 2019)], self.inventory.summary())
+
+
+class TestIsUnder(unittest.TestCase):
+    def testIsUnder(self):
+        self.assertTrue(is_under("src/foo.py", ["src"]))
+        self.assertTrue(is_under("src/foo.py", ["src/"]))
+        self.assertTrue(is_under("src/foo.py", ["."]))
+        self.assertTrue(is_under("src", ["src"]))
+        self.assertFalse(is_under("srcfoo/foo.py", ["src"]))
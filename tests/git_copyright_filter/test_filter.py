@@ -0,0 +1,100 @@
+import io
+import unittest
+
+from git_copyright_filter import FilterProcess
+from git_copyright_filter import HeaderFilter
+from git_copyright_filter import read_pkt_chunks
+from git_copyright_filter import read_pkt_text
+from git_copyright_filter import split_header
+from git_copyright_filter import write_flush
+from git_copyright_filter import write_pkt_content
+from git_copyright_filter import write_pkt_text
+
+
+def git_request(*lines, content=None):
+    fp = io.BytesIO()
+    write_pkt_text(fp, *lines)
+    if content is not None:
+        write_pkt_content(fp, [content])
+    return fp.getvalue()
+
+
+class TestSplitHeader(unittest.TestCase):
+    def testAcrossChunks(self):
+        chunks = [b"1\n2\n", b"3\n4", b"\n5\n"]
+        header, rest = split_header(chunks, lines=4)
+        self.assertEqual(b"1\n2\n3\n4\n", header)
+        self.assertEqual(b"5\n", b"".join(rest))
+        # the rest is a view on the chunk received, not a copy
+        self.assertIs(chunks[2], rest[0].obj)
+
+    def testShortContent(self):
+        header, rest = split_header([b"1\n2"], lines=4)
+        self.assertEqual(b"1\n2", header)
+        self.assertEqual([], rest)
+
+
+class TestHeaderFilter(unittest.TestCase):
+    def setUp(self):
+        self.f = HeaderFilter("Foo Corp, Inc.", 2016, old_copyright_name="Old Co")
+
+    def testYear(self):
+        chunks = [b"# Copyright 2015 Foo Corp, Inc.\nprint(1)\n"]
+        result = self.f.filter("foo.py", chunks)
+        self.assertEqual(b"# Copyright 2015-2016 Foo Corp, Inc.\nprint(1)\n", b"".join(result))
+
+    def testNameAndYear(self):
+        chunks = [b"#!/bin/sh\n# Copyright 2014 Old Co\n"]
+        result = self.f.filter("foo.sh", chunks)
+        self.assertEqual(b"#!/bin/sh\n# Copyright 2014,2016 Foo Corp, Inc.\n", b"".join(result))
+
+    def testUnchangedIsPassedThrough(self):
+        chunks = [b"# Copyright 2016 Foo Corp, Inc.\n", b"data\n"]
+        self.assertIs(chunks, self.f.filter("foo.py", chunks))
+
+        chunks = [b"\xff\xfe binary"]
+        self.assertIs(chunks, self.f.filter("foo.bin", chunks))
+
+
+class TestFilterProcess(unittest.TestCase):
+    def _serve(self, requests, capabilities=("clean",), expected=None):
+        stdin = io.BytesIO(
+            git_request("git-filter-client", "version=2")
+            + git_request(*(f"capability={c}" for c in capabilities))
+            + b"".join(requests)
+        )
+        stdout = io.BytesIO()
+        process = FilterProcess(HeaderFilter("Foo Corp, Inc.", 2016), stdin, stdout)
+        process.serve()
+        stdout.seek(0)
+        self.assertEqual(["git-filter-server", "version=2"], read_pkt_text(stdout))
+        expected = capabilities if expected is None else expected
+        self.assertEqual([f"capability={c}" for c in expected], read_pkt_text(stdout))
+        return stdout
+
+    def testClean(self):
+        stdout = self._serve(
+            [
+                git_request(
+                    "command=clean",
+                    "pathname=foo.py",
+                    content=b"# Copyright 2015 Foo Corp, Inc.\n",
+                )
+            ]
+        )
+        self.assertEqual(["status=success"], read_pkt_text(stdout))
+        self.assertEqual([b"# Copyright 2015-2016 Foo Corp, Inc.\n"], read_pkt_chunks(stdout))
+        self.assertEqual([], read_pkt_text(stdout))
+        self.assertEqual(b"", stdout.read())
+
+    def testUnsupportedCommand(self):
+        stdout = self._serve(
+            [git_request("command=smudge", "pathname=foo.py", content=b"data")]
+        )
+        self.assertEqual(["status=error"], read_pkt_text(stdout))
+
+    def testDelayIsNotOffered(self):
+        stdout = self._serve(
+            [], capabilities=("clean", "smudge", "delay"), expected=("clean",)
+        )
+        self.assertEqual(b"", stdout.read())
@@ -0,0 +1,184 @@
+import io
+import os
+import shutil
+import subprocess
+import tarfile
+import tempfile
+import unittest
+import zipfile
+
+from update_copyright_archive import PrefixedReader
+from update_copyright_archive import UpdateArchive
+
+
+MEMBERS = {
+    "src/a.py": b"#!/usr/bin/env python\n# Copyright 2015 Foo Corp, Inc.\nprint(1)\n",
+    "src/b.py": b"# Copyright 2016 Foo Corp, Inc.\n",
+    "src/c.bin": bytes(range(256)) * 100,
+    "README.md": b"Copyright 2015 Foo Corp, Inc.\n",
+}
+
+EXPECTED = dict(
+    MEMBERS,
+    **{
+        "src/a.py": b"#!/usr/bin/env python\n# Copyright 2015-2016 Foo Corp, Inc.\nprint(1)\n",
+        "README.md": b"Copyright 2015-2016 Foo Corp, Inc.\n",
+    },
+)
+
+
+class NonSeekable(io.RawIOBase):
+    """Forces zipfile to write data descriptors"""
+
+    def __init__(self, fp):
+        self._fp = fp
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        return self._fp.write(data)
+
+
+class TestPrefixedReader(unittest.TestCase):
+    def testRead(self):
+        reader = io.BufferedReader(PrefixedReader(b"abc", io.BytesIO(b"defg")), 2)
+        self.assertEqual(b"abcdefg", reader.read())
+
+
+class TestUpdateArchive(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.tool = UpdateArchive("Foo Corp, Inc.", 2016, skip_comment_check_for=["*.md"])
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def _path(self, name):
+        return os.path.join(self.tmpdir, name)
+
+    def _make_tar(self, name):
+        with tarfile.open(self._path(name), "w:gz") as tar:
+            for member, data in MEMBERS.items():
+                info = tarfile.TarInfo(member)
+                info.size = len(data)
+                info.mode = 0o755
+                tar.addfile(info, io.BytesIO(data))
+        return self._path(name)
+
+    def _make_zip(self, name, seekable=True):
+        with open(self._path(name), "wb") as fp:
+            target = fp if seekable else NonSeekable(fp)
+            with zipfile.ZipFile(target, "w", zipfile.ZIP_DEFLATED) as zout:
+                for member, data in MEMBERS.items():
+                    zout.writestr(member, data)
+        return self._path(name)
+
+    def _read_tar(self, filename):
+        with tarfile.open(filename) as tar:
+            return {m.name: tar.extractfile(m).read() for m in tar.getmembers()}
+
+    def _read_zip(self, filename):
+        with zipfile.ZipFile(filename) as zin:
+            self.assertIsNone(zin.testzip())
+            return {name: zin.read(name) for name in zin.namelist()}
+
+    def testTar(self):
+        source = self._make_tar("in.tar.gz")
+        updated = self.tool.run(source, self._path("out.tar.gz"))
+
+        self.assertEqual(["src/a.py", "README.md"], updated)
+        self.assertEqual(EXPECTED, self._read_tar(self._path("out.tar.gz")))
+        with tarfile.open(self._path("out.tar.gz")) as tar:
+            self.assertEqual(0o755, tar.getmember("src/a.py").mode)
+
+    def testTarPaxSize(self):
+        source = self._path("in.tar")
+        with tarfile.open(source, "w", format=tarfile.PAX_FORMAT) as tar:
+            data = MEMBERS["src/a.py"]
+            info = tarfile.TarInfo("src/a.py")
+            info.size = len(data)
+            info.pax_headers = {"size": str(len(data)), "comment": "kept"}
+            tar.addfile(info, io.BytesIO(data))
+
+        self.assertEqual(["src/a.py"], self.tool.run(source, self._path("out.tar")))
+        self.assertEqual({"src/a.py": EXPECTED["src/a.py"]}, self._read_tar(self._path("out.tar")))
+        with tarfile.open(self._path("out.tar")) as tar:
+            self.assertEqual("kept", tar.getmember("src/a.py").pax_headers["comment"])
+
+    def testZip(self):
+        for seekable in (True, False):
+            source = self._make_zip("in.zip", seekable=seekable)
+            updated = self.tool.run(source, self._path("out.zip"))
+
+            self.assertEqual(["src/a.py", "README.md"], updated)
+            self.assertEqual(EXPECTED, self._read_zip(self._path("out.zip")))
+
+    def testZipCopiesUntouchedCompressed(self):
+        source = self._make_zip("in.zip")
+        self.tool.run(source, self._path("out.zip"))
+
+        with zipfile.ZipFile(source) as zin, zipfile.ZipFile(self._path("out.zip")) as zout:
+            for name in ("src/b.py", "src/c.bin"):
+                before, after = zin.getinfo(name), zout.getinfo(name)
+                self.assertEqual(before.compress_type, after.compress_type)
+                self.assertEqual(before.compress_size, after.compress_size)
+                self.assertEqual(before.CRC, after.CRC)
+
+    def testZipKeepsMetadata(self):
+        source = self._path("in.zip")
+        # extended timestamp, as written by Info-ZIP
+        extra = b"UT\x05\x00\x01\x00\x00\x00\x00"
+        with zipfile.ZipFile(source, "w", zipfile.ZIP_DEFLATED) as zout:
+            zout.comment = b"archive comment"
+            info = zipfile.ZipInfo("src/a.py", (2015, 1, 2, 3, 4, 6))
+            info.compress_type = zipfile.ZIP_DEFLATED
+            info.comment = b"member comment"
+            info.extra = extra
+            info.internal_attr = 1
+            info.external_attr = 0o100755 << 16
+            info.create_version = 30
+            zout.writestr(info, MEMBERS["src/a.py"])
+
+        self.assertEqual(["src/a.py"], self.tool.run(source, self._path("out.zip")))
+
+        with zipfile.ZipFile(self._path("out.zip")) as zin:
+            self.assertEqual(b"archive comment", zin.comment)
+            after = zin.getinfo("src/a.py")
+            self.assertEqual(EXPECTED["src/a.py"], zin.read(after))
+        self.assertEqual((2015, 1, 2, 3, 4, 6), after.date_time)
+        self.assertEqual(b"member comment", after.comment)
+        self.assertEqual(extra, after.extra)
+        self.assertEqual(1, after.internal_attr)
+        self.assertEqual(0o100755 << 16, after.external_attr)
+        self.assertEqual(30, after.create_version)
+
+    @unittest.skipIf(shutil.which("zip") is None, "zip is not installed")
+    def testZipKeepsEncryptedMembers(self):
+        for name in ("src/a.py", "README.md"):
+            os.makedirs(os.path.dirname(self._path(name)), exist_ok=True)
+            with open(self._path(name), "wb") as fp:
+                fp.write(MEMBERS[name])
+        # Info-ZIP sets bit 3 on encrypted members
+        subprocess.run(
+            ["zip", "-q", "-P", "pw", "in.zip", "src/a.py", "README.md"],
+            cwd=self.tmpdir,
+            check=True,
+        )
+
+        self.assertEqual([], self.tool.run(self._path("in.zip"), self._path("out.zip")))
+
+        with zipfile.ZipFile(self._path("out.zip")) as zin:
+            for info in zin.infolist():
+                self.assertEqual(0x09, info.flag_bits & 0x09)
+                self.assertEqual(MEMBERS[info.filename], zin.read(info, pwd=b"pw"))
+
+    def testInclude(self):
+        tool = UpdateArchive("Foo Corp, Inc.", 2016, include=["*.md"], skip_comment_check_for=["*.md"])
+        source = self._make_tar("in.tar.gz")
+        self.assertEqual(["README.md"], tool.run(source, self._path("out.tar")))
+
+    def testDryRun(self):
+        for source in (self._make_tar("in.tar.gz"), self._make_zip("in.zip")):
+            self.assertEqual(["src/a.py", "README.md"], self.tool.run(source, self._path("out"), dry_run=True))
+            self.assertFalse(os.path.exists(self._path("out")))
@@ -0,0 +1,241 @@
+import io
+import os
+import shutil
+import stat
+import subprocess
+import tempfile
+import unittest
+
+from update_copyright_year import INSERTED, MISSING, SKIPPED, UPDATED
+from update_copyright_year import Journal
+from update_copyright_year import UpdateCopyright
+from update_copyright_year import comment_style
+from update_copyright_year import header_patch
+from update_copyright_year import prepend_header
+from update_copyright_year import source_encoding
+
+
+class TestInsertMissing(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.u = UpdateCopyright("Foo Corp, Inc.", 2016)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def _write(self, name, contents):
+        filename = os.path.join(self.tmpdir, name)
+        with open(filename, "wb") as fp:
+            fp.write(contents)
+        return filename
+
+    def _read(self, filename):
+        with open(filename, "rb") as fp:
+            return fp.read()
+
+    def testCommentStyle(self):
+        self.assertEqual("#", comment_style("foo/bar.py"))
+        self.assertEqual("#", comment_style("Makefile"))
+        self.assertEqual(";;", comment_style("init.el"))
+        self.assertIsNone(comment_style("foo.txt"))
+
+    def testPlain(self):
+        filename = self._write("foo.py", b"print(1)\n")
+        self.assertEqual(INSERTED, self.u.update_file(filename, insert_missing=True))
+        self.assertEqual(b"# Copyright 2016 Foo Corp, Inc.\nprint(1)\n", self._read(filename))
+
+        # the header is found from now on
+        self.assertNotEqual(INSERTED, self.u.update_file(filename, insert_missing=True))
+
+    def testAfterShebangAndCoding(self):
+        filename = self._write(
+            "foo.py", b"#!/usr/bin/env python\n# -*- coding: latin-1 -*-\nprint(1)\n"
+        )
+        os.chmod(filename, 0o755)
+        self.u.update_file(filename, insert_missing=True)
+
+        self.assertEqual(
+            b"#!/usr/bin/env python\n"
+            b"# -*- coding: latin-1 -*-\n"
+            b"# Copyright 2016 Foo Corp, Inc.\n"
+            b"print(1)\n",
+            self._read(filename),
+        )
+        self.assertEqual(0o755, stat.S_IMODE(os.stat(filename).st_mode))
+
+    def testShebangWithoutNewline(self):
+        filename = self._write("foo.sh", b"#!/bin/sh")
+        prepend_header(filename, "# Copyright 2016 Foo Corp, Inc.")
+        self.assertEqual(b"#!/bin/sh\n# Copyright 2016 Foo Corp, Inc.\n", self._read(filename))
+
+    def testCRLF(self):
+        filename = self._write("foo.ini", b"a = 1\r\n")
+        self.u.update_file(filename, insert_missing=True)
+        self.assertEqual(b"; Copyright 2016 Foo Corp, Inc.\r\na = 1\r\n", self._read(filename))
+
+    def testLargeFile(self):
+        body = b"x" * 1000 + b"\n"
+        filename = self._write("big.py", body * 5000)
+        self.u.update_file(filename, insert_missing=True)
+        self.assertEqual(b"# Copyright 2016 Foo Corp, Inc.\n" + body * 5000, self._read(filename))
+        self.assertEqual(["big.py"], os.listdir(self.tmpdir))
+
+    def testUncommented(self):
+        filename = self._write("README.md", b"Docs\n")
+        self.u.update_file(filename, skip_comment_check_for=["*.md"], insert_missing=True)
+        self.assertEqual(b"Copyright 2016 Foo Corp, Inc.\nDocs\n", self._read(filename))
+
+    def testSkipped(self):
+        unknown = self._write("foo.txt", b"text\n")
+        other = self._write("foo.py", b"# Copyright 2010 Someone Else\n")
+        for filename in (unknown, other):
+            before = self._read(filename)
+            self.assertEqual(MISSING, self.u.update_file(filename, insert_missing=True))
+            self.assertEqual(before, self._read(filename))
+
+    def testDryRun(self):
+        filename = self._write("foo.py", b"print(1)\n")
+        self.assertEqual(INSERTED, self.u.update_file(filename, dry_run=True, insert_missing=True))
+        self.assertEqual(b"print(1)\n", self._read(filename))
+
+    def testPatch(self):
+        filename = self._write("foo.py", b"#!/usr/bin/env python\nprint(1)\n")
+        patch = io.BytesIO()
+        self.u.update_file(filename, insert_missing=True, patch=patch)
+        self.assertEqual(header_patch(filename, "# Copyright 2016 Foo Corp, Inc."), patch.getvalue())
+        self.assertIn(
+            b"@@ -1,2 +1,3 @@\n"
+            b" #!/usr/bin/env python\n"
+            b"+# Copyright 2016 Foo Corp, Inc.\n"
+            b" print(1)\n",
+            patch.getvalue(),
+        )
+        self.assertEqual(b"#!/usr/bin/env python\nprint(1)\n", self._read(filename))
+
+    def testLatin1(self):
+        latin1 = b"# -*- coding: latin-1 -*-\nname = 'caf\xe9'\n"
+        filename = self._write("foo.py", latin1)
+        self.assertEqual(INSERTED, self.u.update_file(filename, insert_missing=True))
+        self.assertEqual(
+            b"# -*- coding: latin-1 -*-\n"
+            b"# Copyright 2016 Foo Corp, Inc.\n"
+            b"name = 'caf\xe9'\n",
+            self._read(filename),
+        )
+
+        # updating the header later keeps the file in its encoding
+        self.u = UpdateCopyright("Foo Corp, Inc.", 2017)
+        self.assertEqual(UPDATED, self.u.update_file(filename, insert_missing=True))
+        self.assertEqual(
+            b"# -*- coding: latin-1 -*-\n"
+            b"# Copyright 2016-2017 Foo Corp, Inc.\n"
+            b"name = 'caf\xe9'\n",
+            self._read(filename),
+        )
+
+    def testLatin1Patch(self):
+        latin1 = b"# -*- coding: latin-1 -*-\nname = 'caf\xe9'\n"
+        filename = self._write("foo.py", latin1)
+        patch = io.BytesIO()
+        self.assertEqual(
+            INSERTED, self.u.update_file(filename, insert_missing=True, patch=patch)
+        )
+        # the context lines are the bytes of the file, not their UTF-8
+        self.assertIn(
+            b" # -*- coding: latin-1 -*-\n"
+            b"+# Copyright 2016 Foo Corp, Inc.\n"
+            b" name = 'caf\xe9'\n",
+            patch.getvalue(),
+        )
+        self.assertEqual(latin1, self._read(filename))
+
+        filename = self._write(
+            "bar.py",
+            b"# -*- coding: latin-1 -*-\n# Copyright 2015 Foo Corp, Inc.\nname = 'caf\xe9'\n",
+        )
+        patch = io.BytesIO()
+        self.assertEqual(UPDATED, self.u.update_file(filename, patch=patch))
+        self.assertIn(b"+# Copyright 2015-2016 Foo Corp, Inc.\n name = 'caf\xe9'\n", patch.getvalue())
+
+    @unittest.skipIf(shutil.which("git") is None, "git is not installed")
+    def testLatin1PatchApplies(self):
+        self._write("foo.py", b"# -*- coding: latin-1 -*-\nname = 'caf\xe9'\n")
+        self._write(
+            "bar.py",
+            b"# -*- coding: latin-1 -*-\n# Copyright 2015 Foo Corp, Inc.\nname = 'caf\xe9'\n",
+        )
+        patch = io.BytesIO()
+        cwd = os.getcwd()
+        os.chdir(self.tmpdir)
+        try:
+            self.u.run(["foo.py", "bar.py"], insert_missing=True, patch=patch)
+        finally:
+            os.chdir(cwd)
+
+        subprocess.run(
+            ["git", "apply", "--check", "-"],
+            input=patch.getvalue(),
+            cwd=self.tmpdir,
+            check=True,
+            capture_output=True,
+        )
+
+    def testUnknownEncoding(self):
+        filename = self._write(
+            "b.sh", b"#!/bin/sh\n# fileencoding=bogus\necho 1\n"
+        )
+        patch = io.BytesIO()
+        self.assertEqual(
+            INSERTED, self.u.update_file(filename, insert_missing=True, patch=patch)
+        )
+        self.assertIn(b"+# Copyright 2016 Foo Corp, Inc.\n", patch.getvalue())
+
+        self.assertEqual(INSERTED, self.u.update_file(filename, insert_missing=True))
+        self.assertEqual(
+            b"#!/bin/sh\n# fileencoding=bogus\n# Copyright 2016 Foo Corp, Inc.\necho 1\n",
+            self._read(filename),
+        )
+
+        filename = self._write("a.yaml", b"# decoding: now handled elsewhere\nkey: 1\n")
+        self.assertEqual(INSERTED, self.u.update_file(filename, insert_missing=True))
+        self.assertEqual(
+            b"# decoding: now handled elsewhere\n# Copyright 2016 Foo Corp, Inc.\nkey: 1\n",
+            self._read(filename),
+        )
+
+    def testCookieOnlyInPython(self):
+        cookie = b"# encoding: latin-1\n"
+        self.assertEqual("iso8859-1", source_encoding(self._write("a.py", cookie)))
+        self.assertEqual(
+            "iso8859-1",
+            source_encoding(self._write("a", b"#!/usr/bin/python3\n" + cookie)),
+        )
+        self.assertIsNone(source_encoding(self._write("a.yaml", cookie)))
+        self.assertIsNone(source_encoding(self._write("a.sh", b"#!/bin/sh\n" + cookie)))
+
+    def testCookieIgnoredOutsidePython(self):
+        filename = self._write(
+            "c.yaml",
+            "# encoding: ascii (keys only)\n"
+            "# Copyright 2015 Foo Corp, Inc.\n"
+            "name: caf\u00e9\n".encode("utf-8"),
+        )
+        self.assertEqual(UPDATED, self.u.update_file(filename))
+        self.assertEqual(
+            "# encoding: ascii (keys only)\n"
+            "# Copyright 2015-2016 Foo Corp, Inc.\n"
+            "name: caf\u00e9\n".encode("utf-8"),
+            self._read(filename),
+        )
+
+    def testUndecodableIsSkipped(self):
+        bad = self._write("bad.yaml", b"# Copyright 2015 Foo Corp, Inc.\nname: caf\xe9\n")
+        good = self._write("good.yaml", b"# Copyright 2015 Foo Corp, Inc.\n")
+
+        journal = Journal(os.path.join(self.tmpdir, "journal"))
+        results = self.u.run([bad, good], insert_missing=True, journal=journal)
+        journal.close()
+        self.assertEqual({bad: SKIPPED, good: UPDATED}, results)
+        # left for a resumed run to try again
+        self.assertEqual([good], list(Journal.load(os.path.join(self.tmpdir, "journal"))))
+        self.assertEqual(b"# Copyright 2015 Foo Corp, Inc.\nname: caf\xe9\n", self._read(bad))
@@ -0,0 +1,105 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+try:
+    from unittest import mock
+except ImportError:
+    import unittest.mock as mock
+
+from update_copyright_year import CURRENT, UPDATED
+from update_copyright_year import Journal
+from update_copyright_year import UpdateCopyright
+
+
+class TestJournal(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.journal = os.path.join(self.tmpdir, "journal")
+        self.u = UpdateCopyright("Foo Corp, Inc.", 2016)
+        self.files = []
+        for i in range(3):
+            filename = os.path.join(self.tmpdir, f"{i} foo.py")
+            with open(filename, "w") as fp:
+                fp.write("# Copyright 2015 Foo Corp, Inc.\n")
+            self.files.append(filename)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def testRecordAndLoad(self):
+        journal = Journal(self.journal)
+        self.u.run(self.files, journal=journal)
+        journal.close()
+
+        completed = Journal.load(self.journal)
+        self.assertEqual(set(self.files), set(completed))
+        self.assertEqual(UPDATED, completed[self.files[0]][0])
+
+    def testResumeSkipsFinished(self):
+        journal = Journal(self.journal)
+        self.u.run(self.files[:2], journal=journal)
+        journal.close()
+
+        # simulate being killed while writing the next record
+        with open(self.journal, "a") as fp:
+            fp.write(f'updated 1 2 "{self.files[2]}')
+
+        journal = Journal(self.journal, resume=True)
+        with mock.patch.object(self.u, "update_file", return_value=CURRENT) as update_file:
+            results = self.u.run(self.files, journal=journal)
+        journal.close()
+
+        self.assertEqual(1, update_file.call_count)
+        self.assertEqual(self.files[2], update_file.call_args[0][0])
+        self.assertEqual([UPDATED, UPDATED, CURRENT], list(results.values()))
+
+        # the record cut short must not swallow the one written after it
+        self.assertEqual(CURRENT, Journal.load(self.journal)[self.files[2]][0])
+
+    def testResumeRedoesChanged(self):
+        journal = Journal(self.journal)
+        self.u.run(self.files, journal=journal)
+        journal.close()
+
+        with open(self.files[1], "w") as fp:
+            fp.write("# Copyright 2014 Foo Corp, Inc.\n# changed\n")
+
+        journal = Journal(self.journal, resume=True)
+        self.assertEqual(UPDATED, journal.completed(self.files[0]))
+        self.assertIsNone(journal.completed(self.files[1]))
+        journal.close()
+
+    def testWithoutResumeStartsOver(self):
+        journal = Journal(self.journal)
+        self.u.run(self.files, journal=journal)
+        journal.close()
+
+        journal = Journal(self.journal)
+        self.assertIsNone(journal.completed(self.files[0]))
+        journal.close()
+        self.assertEqual({}, Journal.load(self.journal))
+
+    def testResumeNeedsTheSameMode(self):
+        journal = Journal(self.journal, mode=Journal.mode_for(dry_run=True))
+        self.u.run(self.files, dry_run=True, journal=journal)
+        journal.close()
+        self.assertEqual("dry-run", Journal.load_mode(self.journal))
+
+        # the dry run left the files alone, a real run must not skip them
+        with self.assertRaises(ValueError):
+            Journal(self.journal, resume=True)
+        with self.assertRaises(ValueError):
+            Journal(self.journal, resume=True, mode=Journal.mode_for(insert_missing=True))
+
+        journal = Journal(self.journal, resume=True, mode="dry-run")
+        self.assertEqual(UPDATED, journal.completed(self.files[0]))
+        journal.close()
+
+    def testModeFor(self):
+        self.assertEqual("write", Journal.mode_for())
+        self.assertEqual(
+            "emit-patch insert-missing",
+            Journal.mode_for(patch=True, insert_missing=True),
+        )
@@ -0,0 +1,214 @@
+import random
+import re
+import time
+import unittest
+
+from update_copyright_year import CopyrightParser
+from update_copyright_year import UpdateCopyright
+
+
+NAME = "Foo Corp, Inc."
+
+TOKENS = [
+    " ",
+    "  ",
+    "\t",
+    "\n",
+    "#",
+    ";",
+    "(c)",
+    "(C)",
+    "©",
+    "Copyright",
+    "COPYRIGHT",
+    "copyright:",
+    ":",
+    "1",
+    "15",
+    "2014",
+    "-",
+    " - ",
+    ",",
+    ", ",
+    NAME,
+    NAME.lower(),
+    "Foo",
+    "x",
+    "- Foo",
+]
+
+
+def any_holder_regex():
+    return re.compile(
+        UpdateCopyright._commented_copyright_regex.format(
+            COPYRIGHT_NAME=r"(?P<holder>\S.*?)"
+        ),
+        re.VERBOSE | re.IGNORECASE,
+    )
+
+
+def random_line(rng):
+    return "".join(rng.choice(TOKENS) for _ in range(rng.randint(1, 16)))
+
+
+def random_header(rng):
+    """Lines built to follow the grammar, with the occasional mistake"""
+    years = []
+    for _ in range(rng.randint(1, 5)):
+        year = str(rng.choice([rng.randint(1990, 2030), rng.randint(0, 99)]))
+        if rng.random() < 0.4:
+            year += rng.choice(["-", " - ", "- "]) + str(rng.randint(0, 2030))
+        years.append(year)
+
+    parts = [
+        rng.choice(["", " ", "\t"]),
+        rng.choice(["#", "##", ";", "#;", ""]),
+        rng.choice(["", " "]),
+        rng.choice(["", "(c) ", "© ", "(C)"]),
+        rng.choice(["Copyright", "copyright:", "COPYRIGHT", "Copyrite"]),
+        rng.choice([" ", "  ", ""]),
+        rng.choice(["", "(c) ", "©"]),
+        rng.choice([",", ", ", " ,"]).join(years),
+        rng.choice([" ", "\t", " , ", ""]),
+        rng.choice([NAME, NAME.upper(), "Someone Else", "- " + NAME]),
+        rng.choice(["", " ", "\n", " \n", "x"]),
+    ]
+    return "".join(parts)
+
+
+class TestParserAgreesWithRegex(unittest.TestCase):
+    def setUp(self):
+        self.rng = random.Random(1234)
+        self.pairs = [
+            (
+                CopyrightParser(NAME, commented=commented),
+                UpdateCopyright.compile_regex(NAME, commented=commented),
+            )
+            for commented in (True, False)
+        ]
+
+    def assertAgrees(self, line):
+        for parser, regex in self.pairs:
+            expected = regex.match(line)
+            result = parser.match(line)
+            if expected is None:
+                self.assertIsNone(result, repr(line))
+            else:
+                self.assertIsNotNone(result, repr(line))
+                self.assertEqual(expected.span(1), result.span(1), repr(line))
+                self.assertEqual(expected.group("years"), result.group("years"))
+
+    def testKnownLines(self):
+        for line in [
+            "# Copyright 2015 Foo Corp, Inc.",
+            " # Copyright: (c) 2014 Foo Corp, Inc.\n",
+            "# Copyright © 2010,2012,2014 Foo Corp, Inc.",
+            " # Copyright: 2005 - 2010, 2013, 2015 - 2017 Foo Corp, Inc.",
+            "# Copyright 2014 - Foo Corp, Inc.",
+            "# Copyright 2014, Foo Corp, Inc.",
+            "# Copyright 2014-2015-2016 Foo Corp, Inc.",
+            "Copyright 2015 Foo Corp, Inc.",
+            "# COPYRIGHT 2015 FOO CORP, INC.",
+            "# Copyright 2015 Foo Corp, Inc. and others",
+            "# COPYR\u0130GHT 2015 Foo Corp, Inc.",
+            "# copyr\u0131ght 2015 Foo Corp, Inc.",
+        ]:
+            self.assertAgrees(line)
+
+    def testRandomLines(self):
+        for _ in range(20000):
+            self.assertAgrees(random_line(self.rng))
+
+    def testRandomHeaders(self):
+        matched = 0
+        for _ in range(20000):
+            line = random_header(self.rng)
+            self.assertAgrees(line)
+            matched += self.pairs[0][0].match(line) is not None
+
+        # make sure the generator exercises the matching paths as well
+        self.assertGreater(matched, 1000)
+
+    def testNameStartingWithDash(self):
+        name = "- Foo"
+        parser = CopyrightParser(name)
+        regex = UpdateCopyright.compile_regex(name)
+        for line in ["# Copyright 2014 - Foo", "# Copyright 2014 - 2015 - Foo"]:
+            self.assertEqual(regex.match(line).span(1), parser.match(line).span(1))
+
+    def testAnyHolder(self):
+        regex = any_holder_regex()
+        parser = CopyrightParser()
+        for _ in range(20000):
+            line = random_header(self.rng)
+            expected = regex.match(line)
+            result = parser.match(line)
+            if expected is None:
+                self.assertIsNone(result, repr(line))
+            else:
+                self.assertEqual(expected.span(1), result.span(1), repr(line))
+                self.assertEqual(expected.group("holder"), result.group("holder"))
+
+
+class TestParserPerformance(unittest.TestCase):
+    SIZE = 100000
+
+    PATHOLOGICAL = [
+        "# Copyright " + "1," * (SIZE // 2) + "x",
+        "# Copyright " + "1 , " * (SIZE // 4) + NAME + " x",
+        "# Copyright " + "1 - 1, " * (SIZE // 7),
+        "# Copyright 1" + " " * SIZE + "x",
+        "# Copyright " + "1" * SIZE + " " + NAME + "x",
+        "#" * SIZE,
+        "# Copyright 1 " + " ".join([NAME[:-1]] * (SIZE // len(NAME))),
+        "# Copyright 2014" + ("," + " " * 100 + "1") * (SIZE // 102) + " x",
+    ]
+
+    # Typical first lines of a file
+    ORDINARY = [
+        "#!/usr/bin/env python\n",
+        "\n",
+        "# -*- coding: utf-8 -*-\n",
+        "# This file is part of the Foo project\n",
+        "import os\n",
+        "    return self._value\n",
+        "# Copyright 2010-2015 Foo Corp, Inc.\n",
+    ]
+
+    def _elapsed(self, parser, line, number=1):
+        start = time.perf_counter()
+        for _ in range(number):
+            parser.match(line)
+        return time.perf_counter() - start
+
+    def testPathological(self):
+        parser = CopyrightParser(NAME)
+        for line in self.PATHOLOGICAL:
+            self.assertLess(self._elapsed(parser, line), 2.0, repr(line[:40]))
+
+    def testLinear(self):
+        parser = CopyrightParser(NAME)
+        for line in self.PATHOLOGICAL:
+            small = min(self._elapsed(parser, line[: len(line) // 4]) for _ in range(3))
+            large = min(self._elapsed(parser, line) for _ in range(3))
+            # four times the input should take about four times as long
+            self.assertLess(large, small * 16 + 0.01, repr(line[:40]))
+
+    def testFasterThanRegexWhenItBacktracks(self):
+        # The lazy holder followed by \s*$ rescans the whitespace for every
+        # character it extends over, so the regex is quadratic here
+        line = "# Copyright 2014 Foo" + " " * (self.SIZE // 20) + "x"
+        regex = self._elapsed(any_holder_regex(), line)
+        parser = min(self._elapsed(CopyrightParser(), line) for _ in range(3))
+        self.assertLess(parser * 20, regex)
+
+    def testOrdinaryLines(self):
+        pairs = [
+            (CopyrightParser(NAME), UpdateCopyright.compile_regex(NAME)),
+            (CopyrightParser(), any_holder_regex()),
+        ]
+        for parser, regex in pairs:
+            for line in self.ORDINARY:
+                expected = min(self._elapsed(regex, line, 2000) for _ in range(3))
+                elapsed = min(self._elapsed(parser, line, 2000) for _ in range(3))
+                self.assertLess(elapsed, expected * 10 + 0.005, repr(line))
@@ -0,0 +1,111 @@
+import io
+import os
+import shutil
+import tempfile
+import unittest
+
+try:
+    from unittest import mock
+except ImportError:
+    import unittest.mock as mock
+
+import six
+
+from update_copyright_year import CopyrightedFile
+from update_copyright_year import UPDATED
+from update_copyright_year import UpdateCopyright
+from update_copyright_year import main
+
+
+class TestPatch(unittest.TestCase):
+    def setUp(self):
+        self.copyright_name = "Foo Corp, Inc."
+        self.u = UpdateCopyright(self.copyright_name, 2016)
+
+    def _patch(self, initial, context=3):
+        cf = CopyrightedFile(six.StringIO(initial), self.u._commented_pat, 2016)
+        cf.process("dummy", patch_context=context)
+        return cf, cf.patch("dir/foo.py", context=context)
+
+    def testContext(self):
+        initial = "#!/bin/sh\n# Copyright 2015 {}\n1\n2\n3\n4\n5\n".format(self.copyright_name)
+        cf, diff = self._patch(initial)
+
+        self.assertEqual(
+            b"--- a/dir/foo.py\n"
+            b"+++ b/dir/foo.py\n"
+            b"@@ -1,5 +1,5 @@\n"
+            b" #!/bin/sh\n"
+            b"-# Copyright 2015 Foo Corp, Inc.\n"
+            b"+# Copyright 2015-2016 Foo Corp, Inc.\n"
+            b" 1\n"
+            b" 2\n"
+            b" 3\n",
+            diff,
+        )
+        # only the header and the context were read
+        self.assertEqual(["#!/bin/sh\n", "# Copyright 2015-2016 Foo Corp, Inc.\n", "1\n", "2\n", "3\n"], cf._lines)
+
+    def testNoNewlineAtEnd(self):
+        _, diff = self._patch("# Copyright 2015 {}".format(self.copyright_name))
+        self.assertEqual(
+            b"--- a/dir/foo.py\n"
+            b"+++ b/dir/foo.py\n"
+            b"@@ -1 +1 @@\n"
+            b"-# Copyright 2015 Foo Corp, Inc.\n"
+            b"\\ No newline at end of file\n"
+            b"+# Copyright 2015-2016 Foo Corp, Inc.\n"
+            b"\\ No newline at end of file\n",
+            diff,
+        )
+
+    def testUpToDate(self):
+        _, diff = self._patch("# Copyright 2016 {}\n".format(self.copyright_name))
+        self.assertEqual(b"", diff)
+
+
+class TestEmitPatch(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.filename = os.path.join(self.tmpdir, "foo.py")
+        self.initial = "# Copyright 2015 Foo Corp, Inc.\r\nprint(1)\r\n"
+        with open(self.filename, "w", newline="") as fp:
+            fp.write(self.initial)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def testFileUntouched(self):
+        u = UpdateCopyright("Foo Corp, Inc.", 2016)
+        patch = io.BytesIO()
+        results = u.run([self.filename], patch=patch)
+
+        self.assertEqual({self.filename: UPDATED}, results)
+        self.assertIn(b"+# Copyright 2015-2016 Foo Corp, Inc.\r\n", patch.getvalue())
+        self.assertIn(b" print(1)\r\n", patch.getvalue())
+        with open(self.filename, newline="") as fp:
+            self.assertEqual(self.initial, fp.read())
+
+    def testResumeRejected(self):
+        patch = os.path.join(self.tmpdir, "changes.patch")
+        with open(patch, "w") as fp:
+            fp.write("earlier changes\n")
+
+        argv = [
+            "update_copyright_year.py",
+            "--copyright-name",
+            "Foo Corp, Inc.",
+            "--journal",
+            os.path.join(self.tmpdir, "journal"),
+            "--resume",
+            "--emit-patch",
+            patch,
+            self.filename,
+        ]
+        with mock.patch("sys.argv", argv), mock.patch("sys.stderr"):
+            with self.assertRaises(SystemExit):
+                main()
+
+        # the patch of the earlier run is left alone
+        with open(patch) as fp:
+            self.assertEqual("earlier changes\n", fp.read())
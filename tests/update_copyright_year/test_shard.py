@@ -0,0 +1,106 @@
+import argparse
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from update_copyright_year import CURRENT, INSERTED, MISSING, SKIPPED, UPDATED
+from update_copyright_year import UpdateCopyright
+from update_copyright_year import merge_reports
+from update_copyright_year import select_shard
+from update_copyright_year import shard_spec
+from update_copyright_year import write_report
+
+
+class TestSelectShard(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.files = []
+        for i in range(40):
+            filename = os.path.join(self.tmpdir, f"{i}.py")
+            with open(filename, "w") as fp:
+                fp.write("x" * (i * i))
+            self.files.append(filename)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def assertPartition(self, shards):
+        combined = [filename for shard in shards for filename in shard]
+        self.assertEqual(sorted(self.files), sorted(combined))
+
+    def testHash(self):
+        shards = [select_shard(self.files, i, 4) for i in range(4)]
+        self.assertPartition(shards)
+        # stable no matter the order files were discovered in
+        self.assertEqual(shards[1], select_shard(list(reversed(self.files)), 1, 4)[::-1])
+
+    def testSize(self):
+        shards = [select_shard(self.files, i, 3, balance="size") for i in range(3)]
+        self.assertPartition(shards)
+
+        loads = [sum(os.path.getsize(f) for f in shard) for shard in shards]
+        largest = max(os.path.getsize(f) for f in self.files)
+        self.assertLessEqual(max(loads) - min(loads), largest)
+
+    def testShardSpec(self):
+        self.assertEqual((1, 4), shard_spec("1/4"))
+        for value in ["4/4", "-1/4", "1", "a/b", "0/0"]:
+            with self.assertRaises(argparse.ArgumentTypeError):
+                shard_spec(value)
+
+
+class TestReports(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def _report(self, name, results, shard, dry_run=False):
+        filename = os.path.join(self.tmpdir, name)
+        write_report(filename, results, shard=shard, dry_run=dry_run)
+        return filename
+
+    def testRunOutcomes(self):
+        files = {
+            "a.py": "# Copyright 2015 Foo Corp, Inc.\n",
+            "b.py": "# Copyright 2016 Foo Corp, Inc.\n",
+            "c.py": "print('hi')\n",
+        }
+        for name, contents in files.items():
+            with open(os.path.join(self.tmpdir, name), "w") as fp:
+                fp.write(contents)
+
+        u = UpdateCopyright("Foo Corp, Inc.", 2016)
+        results = u.run([os.path.join(self.tmpdir, name) for name in sorted(files)], dry_run=True)
+        self.assertEqual([UPDATED, CURRENT, MISSING], list(results.values()))
+
+    def testMerge(self):
+        reports = [
+            self._report("0.json", {"a.py": UPDATED, "b.py": MISSING}, (0, 2)),
+            self._report("1.json", {"c.py": CURRENT}, (1, 2)),
+        ]
+        counts, problems = merge_reports(reports)
+        self.assertEqual({UPDATED: 1, INSERTED: 0, CURRENT: 1, MISSING: 1, SKIPPED: 0}, counts)
+        self.assertEqual([], problems)
+
+        with open(reports[0]) as fp:
+            self.assertEqual([0, 2], json.load(fp)["shard"])
+
+    def testMergeMissingShard(self):
+        reports = [self._report("0.json", {"a.py": CURRENT}, (0, 2))]
+        _, problems = merge_reports(reports)
+        self.assertEqual(["shard 1/2 did not report"], problems)
+
+    def testMergeDryRunNeedsUpdate(self):
+        reports = [self._report("0.json", {"a.py": UPDATED}, None, dry_run=True)]
+        _, problems = merge_reports(reports)
+        self.assertEqual(["a.py: needs updating"], problems)
+
+    def testMergeSkipped(self):
+        reports = [self._report("0.json", {"a.py": SKIPPED}, None)]
+        counts, problems = merge_reports(reports)
+        self.assertEqual(1, counts[SKIPPED])
+        self.assertEqual(["a.py: could not be read"], problems)
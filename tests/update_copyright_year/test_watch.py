@@ -0,0 +1,137 @@
+import os
+import shutil
+import struct
+import tempfile
+import unittest
+
+try:
+    from unittest import mock
+except ImportError:
+    import unittest.mock as mock
+
+from update_copyright_year import InotifyWatcher
+from update_copyright_year import PollingWatcher
+from update_copyright_year import UpdateCopyright
+from update_copyright_year import main
+from update_copyright_year import make_watcher
+from update_copyright_year import stat_signature
+
+
+class TestWatch(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.filename = os.path.join(self.tmpdir, "foo.py")
+        self.copyright_name = "Foo Corp, Inc."
+        self.u = UpdateCopyright(self.copyright_name, 2016)
+        self._write(f"# Copyright 2015 {self.copyright_name}\n")
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def _write(self, contents, mtime_ns=None):
+        with open(self.filename, "w") as fp:
+            fp.write(contents)
+        if mtime_ns is not None:
+            os.utime(self.filename, ns=(mtime_ns, mtime_ns))
+
+    def _read(self):
+        with open(self.filename) as fp:
+            return fp.read()
+
+    def testPollingDetectsChange(self):
+        watcher = PollingWatcher([self.tmpdir], interval=0)
+        self.assertEqual(set(), watcher.changes(timeout=0))
+
+        self._write("# changed\n", mtime_ns=10**18)
+        self.assertEqual({self.filename}, watcher.changes(timeout=0))
+        self.assertEqual(set(), watcher.changes(timeout=0))
+
+    def testPollingSkipsHiddenDirectories(self):
+        os.mkdir(os.path.join(self.tmpdir, ".git"))
+        watcher = PollingWatcher([self.tmpdir], interval=0)
+
+        with open(os.path.join(self.tmpdir, ".git", "index"), "w") as fp:
+            fp.write("data")
+        self.assertEqual(set(), watcher.changes(timeout=0))
+
+    def testProcessChangesIgnoresOwnWrites(self):
+        seen = {}
+        self.u.process_changes({self.filename}, seen)
+        self.assertEqual(f"# Copyright 2015-2016 {self.copyright_name}\n", self._read())
+        self.assertEqual(stat_signature(self.filename), seen[self.filename])
+
+        # The event generated by our own write must not reprocess the file
+        with mock.patch.object(self.u, "update_file") as update_file:
+            self.u.process_changes({self.filename}, seen)
+            self.assertFalse(update_file.called)
+
+    def testProcessChangesMissingFile(self):
+        seen = {}
+        os.unlink(self.filename)
+        self.u.process_changes({self.filename}, seen)
+        self.assertEqual({}, seen)
+
+    def testFallbackToPolling(self):
+        self.assertIsInstance(make_watcher([self.tmpdir], poll=True), PollingWatcher)
+
+    def testWatchRejectsOneShotOptions(self):
+        for option in (["--journal", "j"], ["--emit-patch", "-"], ["--insert-missing"]):
+            argv = ["update_copyright_year.py", "--copyright-name", self.copyright_name, "--watch"]
+            with mock.patch("sys.argv", argv + option + [self.tmpdir]):
+                with mock.patch("sys.stderr"), self.assertRaises(SystemExit):
+                    main()
+
+
+class TestInotifyWatcher(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        try:
+            self.watcher = InotifyWatcher([self.tmpdir])
+        except (AttributeError, OSError):
+            shutil.rmtree(self.tmpdir)
+            self.skipTest("inotify is not available")
+
+    def tearDown(self):
+        self.watcher.close()
+        shutil.rmtree(self.tmpdir)
+
+    def _write(self, *names):
+        filename = os.path.join(self.tmpdir, *names)
+        with open(filename, "w") as fp:
+            fp.write("# Copyright 2015 Foo Corp, Inc.\n")
+        return filename
+
+    def testDetectsWrite(self):
+        self.assertEqual(set(), self.watcher.changes(timeout=0))
+
+        filename = self._write("foo.py")
+        self.assertEqual({filename}, self.watcher.changes(timeout=1))
+
+    def testWatchesNewDirectories(self):
+        os.mkdir(os.path.join(self.tmpdir, "sub"))
+        self.assertEqual(set(), self.watcher.changes(timeout=1))
+
+        filename = self._write("sub", "foo.py")
+        self.assertEqual({filename}, self.watcher.changes(timeout=1))
+
+    def testSkipsHiddenDirectories(self):
+        os.mkdir(os.path.join(self.tmpdir, ".git"))
+        self.watcher.changes(timeout=1)
+
+        self._write(".git", "index")
+        self.assertEqual(set(), self.watcher.changes(timeout=0.1))
+
+    def testOverflowReportsEveryFile(self):
+        first = self._write("foo.py")
+        self.watcher.changes(timeout=1)
+        os.mkdir(os.path.join(self.tmpdir, "sub"))
+        second = self._write("sub", "bar.py")
+
+        # the kernel queue overflowed, the events above were lost
+        overflow = struct.pack("iIII", -1, InotifyWatcher.IN_Q_OVERFLOW, 0, 0)
+        with mock.patch("os.read", return_value=overflow):
+            self.assertEqual({first, second}, self.watcher.changes(timeout=1))
+
+        # the directory created while events were lost is watched as well
+        self._write("sub", "bar.py")
+        self.assertEqual({second}, self.watcher.changes(timeout=1))
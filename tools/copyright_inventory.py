@@ -0,0 +1,288 @@
+#!/usr/bin/env python
+
+from concurrent.futures import ProcessPoolExecutor
+import os
+import sqlite3
+
+from update_copyright_year import CopyrightParser
+from update_copyright_year import copyright_years
+from update_copyright_year import HEADER_LINES
+from update_copyright_year import should_skip
+from update_copyright_year import stat_signature
+from update_copyright_year import walk_files
+
+
+# Header lines longer than this are truncated. Keeps minified files cheap.
+MAX_LINE_LENGTH = 64 * 1024
+
+BATCH_SIZE = 1000
+
+SCHEMA = """
+    CREATE TABLE IF NOT EXISTS files (
+        path TEXT PRIMARY KEY,
+        mtime_ns INTEGER NOT NULL,
+        size INTEGER NOT NULL
+    );
+    CREATE TABLE IF NOT EXISTS copyrights (
+        path TEXT NOT NULL,
+        lineno INTEGER NOT NULL,
+        holder TEXT NOT NULL,
+        years TEXT NOT NULL,
+        style TEXT NOT NULL,
+        PRIMARY KEY (path, lineno)
+    );
+    CREATE TABLE IF NOT EXISTS year_ranges (
+        path TEXT NOT NULL,
+        lineno INTEGER NOT NULL,
+        start INTEGER NOT NULL,
+        end INTEGER NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS copyrights_holder ON copyrights (holder);
+    CREATE INDEX IF NOT EXISTS year_ranges_path ON year_ranges (path, lineno);
+"""
+
+_PARSERS = {
+    True: CopyrightParser(commented=True),
+    False: CopyrightParser(commented=False),
+}
+
+
+def scan_file(filename, commented=True):
+    """Find every copyright line in the header of filename.
+
+    Returns the stat signature of the file scanned along with a list of
+    (lineno, holder, years, copyrights, style) for each copyright line.
+    """
+    parser = _PARSERS[commented]
+    found = []
+
+    try:
+        signature = stat_signature(filename)
+        with open(filename, encoding="utf-8", errors="replace") as fp:
+            for lineno in range(1, HEADER_LINES + 1):
+                if not (line := fp.readline(MAX_LINE_LENGTH)):
+                    break  # EOF
+
+                if match := parser.match(line):
+                    years = match.group("years")
+                    found.append(
+                        (
+                            lineno,
+                            match.group("holder"),
+                            years,
+                            copyright_years(years),
+                            match.group("comment"),
+                        )
+                    )
+    except OSError as e:
+        print(f"Skipping {filename}: {e}")
+        return None, []
+
+    return signature, found
+
+
+def _scan(job):
+    filename, commented = job
+    return (filename,) + scan_file(filename, commented)
+
+
+def is_under(path, roots):
+    for root in roots:
+        if root in (".", "") or path == root:
+            return True
+        if path.startswith(root.rstrip(os.sep) + os.sep):
+            return True
+
+    return False
+
+
+class Inventory:
+    """Index the copyright lines found across a tree in SQLite"""
+
+    def __init__(self, database):
+        self._db = sqlite3.connect(database)
+        self._db.executescript(SCHEMA)
+
+    def close(self):
+        self._db.close()
+
+    def _forget(self, paths):
+        rows = [(path,) for path in paths]
+        self._db.executemany("DELETE FROM files WHERE path = ?", rows)
+        self._db.executemany("DELETE FROM copyrights WHERE path = ?", rows)
+        self._db.executemany("DELETE FROM year_ranges WHERE path = ?", rows)
+
+    def _store(self, results):
+        self._forget(path for path, _, _ in results)
+        # vanished or unreadable files only lose what was recorded before
+        results = [result for result in results if result[1] is not None]
+
+        self._db.executemany(
+            "INSERT INTO files (path, mtime_ns, size) VALUES (?, ?, ?)",
+            [(path, *signature) for path, signature, _ in results],
+        )
+        self._db.executemany(
+            "INSERT INTO copyrights (path, lineno, holder, years, style) VALUES (?, ?, ?, ?, ?)",
+            [
+                (path, lineno, holder, years, style)
+                for path, _, found in results
+                for lineno, holder, years, _, style in found
+            ],
+        )
+        self._db.executemany(
+            "INSERT INTO year_ranges (path, lineno, start, end) VALUES (?, ?, ?, ?)",
+            [
+                (path, lineno, start, end)
+                for path, _, found in results
+                for lineno, _, _, copyrights, _ in found
+                for start, end in copyrights
+            ],
+        )
+
+    def update(self, paths, skip_comment_check_for=[], jobs=None, verbose=False):
+        """Rescan the files below paths which changed since the last run.
+
+        Returns the number of files scanned.
+        """
+        paths = [os.path.normpath(path) for path in paths]
+        known = {
+            path: (mtime_ns, size)
+            for path, mtime_ns, size in self._db.execute(
+                "SELECT path, mtime_ns, size FROM files"
+            )
+            if is_under(path, paths)
+        }
+
+        jobs_to_run = []
+        for filename in walk_files(paths):
+            filename = os.path.normpath(filename)
+            if (signature := stat_signature(filename)) is None:
+                continue  # named but gone, forgotten below if known
+            if known.pop(filename, None) == signature:
+                continue
+
+            commented = not should_skip(skip_comment_check_for, filename)
+            jobs_to_run.append((filename, commented))
+
+        with self._db:
+            # whatever is left was deleted since the last run
+            self._forget(known)
+
+        if jobs == 1:
+            results = map(_scan, jobs_to_run)
+            self._store_all(results, verbose)
+        else:
+            with ProcessPoolExecutor(max_workers=jobs) as executor:
+                results = executor.map(_scan, jobs_to_run, chunksize=64)
+                self._store_all(results, verbose)
+
+        return len(jobs_to_run)
+
+    def _store_all(self, results, verbose):
+        batch = []
+        for filename, signature, found in results:
+            if verbose and signature is not None:
+                print(f"Scanned {filename}: {len(found)} copyright(s)")
+
+            batch.append((filename, signature, found))
+            if len(batch) >= BATCH_SIZE:
+                with self._db:
+                    self._store(batch)
+                batch = []
+
+        if batch:
+            with self._db:
+                self._store(batch)
+
+    def summary(self):
+        """Return (holder, style, files, first year, last year) rows"""
+        return self._db.execute(
+            """
+            SELECT c.holder, c.style, COUNT(DISTINCT c.path), MIN(y.start), MAX(y.end)
+            FROM copyrights c
+            JOIN year_ranges y ON y.path = c.path AND y.lineno = c.lineno
+            GROUP BY c.holder, c.style
+            ORDER BY COUNT(DISTINCT c.path) DESC, c.holder
+            """
+        ).fetchall()
+
+    def missing(self):
+        """Return the paths which have no copyright line"""
+        return [
+            path
+            for (path,) in self._db.execute(
+                """
+                SELECT path FROM files
+                WHERE path NOT IN (SELECT path FROM copyrights)
+                ORDER BY path
+                """
+            )
+        ]
+
+
+def main(args=None):
+    import argparse
+    import sys
+
+    if args is None:
+        args = sys.argv[1:]
+
+    parser = argparse.ArgumentParser(
+        description="Record the copyrights found in files without modifying them"
+    )
+    parser.add_argument(
+        "--database",
+        type=str,
+        default="copyrights.sqlite",
+        help="SQLite database holding the inventory. Later runs only rescan files which changed.",
+    )  # noqa
+    parser.add_argument(
+        "--skip-comment-check-for",
+        type=str,
+        action="append",
+        default=[],
+        help="Takes a standard shell glob such as '*.md'. Remember to use single quotes around the glob so the shell does not consume them. Can be repeated as needed.",
+    )  # noqa
+    parser.add_argument(
+        "--jobs", type=int, default=None, help="Number of files scanned in parallel."
+    )
+    parser.add_argument(
+        "--summary",
+        action="store_true",
+        default=False,
+        help="Print the holders, comment styles and years found.",
+    )
+    parser.add_argument(
+        "--missing",
+        action="store_true",
+        default=False,
+        help="Print the files without any copyright line.",
+    )
+    parser.add_argument("--verbose", action="store_true", default=False)
+    parser.add_argument("paths", nargs="+")
+    args = parser.parse_args(args)
+
+    inventory = Inventory(args.database)
+    try:
+        scanned = inventory.update(
+            args.paths,
+            skip_comment_check_for=args.skip_comment_check_for,
+            jobs=args.jobs,
+            verbose=args.verbose,
+        )
+        print(f"Scanned {scanned} file(s)")
+
+        if args.summary:
+            for holder, style, files, first, last in inventory.summary():
+                style = style or "none"
+                print(f"{files:8} {first}-{last} [{style}] {holder}")
+
+        if args.missing:
+            for path in inventory.missing():
+                print(path)
+    finally:
+        inventory.close()
+
+
+if __name__ == "__main__":
+    main()
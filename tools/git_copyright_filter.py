@@ -0,0 +1,280 @@
+#!/usr/bin/env python
+
+from datetime import datetime
+import sys
+
+from update_copyright_name import UpdateCopyright as RenameCopyright
+from update_copyright_year import edit_header
+from update_copyright_year import HEADER_LINES
+from update_copyright_year import UpdateCopyright
+
+
+# Largest payload allowed in a single pkt-line
+MAX_PKT_DATA = 65516
+
+
+class ProtocolError(Exception):
+    pass
+
+
+def read_pkt_line(fp):
+    """Return the payload of the next pkt-line, None for a flush packet.
+
+    Raises EOFError when the stream ends between packets.
+    """
+    header = fp.read(4)
+    if not header:
+        raise EOFError()
+    if len(header) != 4:
+        raise ProtocolError("Truncated pkt-line header")
+
+    length = int(header, 16)
+    if length == 0:
+        return None
+    if length < 4:
+        raise ProtocolError(f"Invalid pkt-line length {length}")
+
+    data = fp.read(length - 4)
+    if len(data) != length - 4:
+        raise ProtocolError("Truncated pkt-line")
+
+    return data
+
+
+def read_pkt_chunks(fp):
+    """Read pkt-lines up to the next flush packet"""
+    chunks = []
+    while (data := read_pkt_line(fp)) is not None:
+        chunks.append(data)
+
+    return chunks
+
+
+def read_pkt_text(fp):
+    return [chunk.decode("utf-8").rstrip("\n") for chunk in read_pkt_chunks(fp)]
+
+
+def write_pkt_line(fp, data):
+    fp.write(b"%04x" % (len(data) + 4))
+    fp.write(data)
+
+
+def write_pkt_text(fp, *lines):
+    for line in lines:
+        write_pkt_line(fp, f"{line}\n".encode("utf-8"))
+    write_flush(fp)
+
+
+def write_pkt_content(fp, chunks):
+    for chunk in chunks:
+        for pos in range(0, len(chunk), MAX_PKT_DATA):
+            write_pkt_line(fp, chunk[pos : pos + MAX_PKT_DATA])
+    write_flush(fp)
+
+
+def write_flush(fp):
+    fp.write(b"0000")
+
+
+def split_header(chunks, lines=HEADER_LINES):
+    """Split the first lines of the content from the rest.
+
+    Returns the header bytes along with the remaining content as a list of
+    memoryviews over the original chunks so the bulk of the file is never
+    copied.
+    """
+    header = []
+    seen = 0
+    for index, chunk in enumerate(chunks):
+        pos = 0
+        while seen < lines:
+            newline = chunk.find(b"\n", pos)
+            if newline == -1:
+                break
+            pos = newline + 1
+            seen += 1
+
+        if seen < lines:
+            header.append(chunk)
+            continue
+
+        header.append(chunk[:pos])
+        rest = [memoryview(chunk)[pos:]] + [memoryview(c) for c in chunks[index + 1 :]]
+        return b"".join(header), rest
+
+    return b"".join(header), []
+
+
+class HeaderFilter:
+    """Apply the copyright name and year updates to in-memory file content"""
+
+    def __init__(
+        self, copyright_name, year, old_copyright_name=None, skip_comment_check_for=[]
+    ):
+        self._skip_comment_check_for = skip_comment_check_for
+        self._year_tool = UpdateCopyright(copyright_name, year)
+        self._name_tool = None
+        if old_copyright_name:
+            self._name_tool = RenameCopyright(old_copyright_name, copyright_name)
+
+    def _update_name(self, pathname, lines):
+        if self._name_tool is None:
+            return
+
+        for pos, line in enumerate(lines):
+            renamed = self._name_tool.rename_line(
+                pathname, line, self._skip_comment_check_for
+            )
+            if renamed is not None:
+                lines[pos] = renamed
+                break
+
+    def _update(self, pathname, lines):
+        self._update_name(pathname, lines)
+        self._year_tool.update_lines(pathname, lines, self._skip_comment_check_for)
+
+    def update_header(self, pathname, header):
+        """Return the updated header, or None when nothing changed"""
+        return edit_header(header, lambda lines: self._update(pathname, lines))
+
+    def filter(self, pathname, chunks):
+        """Return the filtered content as a list of bytes-like chunks.
+
+        When no change is needed the chunks received from git are handed
+        back untouched.
+        """
+        header, rest = split_header(chunks)
+        updated = self.update_header(pathname, header)
+        if updated is None:
+            return chunks
+
+        return [updated] + rest
+
+
+class FilterProcess:
+    """Serve git's long-running filter protocol
+
+    See gitattributes(5), "Long Running Filter Process".
+    """
+
+    # git only offers to delay smudge, which this filter does not serve
+    capabilities = ("clean",)
+
+    def __init__(self, header_filter, stdin, stdout, verbose=False):
+        self._filter = header_filter
+        self._in = stdin
+        self._out = stdout
+        self._verbose = verbose
+        self._capabilities = set()
+
+    def _log(self, message):
+        if self._verbose:
+            print(message, file=sys.stderr)
+
+    def handshake(self):
+        if read_pkt_text(self._in) != ["git-filter-client", "version=2"]:
+            raise ProtocolError("Unexpected filter handshake")
+        write_pkt_text(self._out, "git-filter-server", "version=2")
+
+        requested = {
+            line.partition("=")[2]
+            for line in read_pkt_text(self._in)
+            if line.startswith("capability=")
+        }
+        self._capabilities = requested.intersection(self.capabilities)
+        write_pkt_text(
+            self._out, *(f"capability={c}" for c in self.capabilities if c in self._capabilities)
+        )
+        self._out.flush()
+
+    def _clean(self, pathname, chunks):
+        result = self._filter.filter(pathname, chunks)
+        if result is not chunks:
+            self._log(f"Updated {pathname}")
+
+        write_pkt_text(self._out, "status=success")
+        write_pkt_content(self._out, result)
+        write_flush(self._out)  # keep the status sent above
+
+    def serve_one(self):
+        """Handle a single request. Returns False once git closes the pipe"""
+        try:
+            lines = read_pkt_text(self._in)
+        except EOFError:
+            return False
+
+        request = dict(line.partition("=")[::2] for line in lines)
+        command = request.get("command")
+
+        pathname = request.get("pathname", "")
+        chunks = read_pkt_chunks(self._in)
+        if command == "clean" and "clean" in self._capabilities:
+            try:
+                self._clean(pathname, chunks)
+            except Exception as e:
+                self._log(f"Error filtering {pathname}: {e}")
+                write_pkt_text(self._out, "status=error")
+        else:
+            write_pkt_text(self._out, "status=error")
+
+        self._out.flush()
+        return True
+
+    def serve(self):
+        self.handshake()
+        while self.serve_one():
+            pass
+
+
+def main(args=None):
+    import argparse
+
+    if args is None:
+        args = sys.argv[1:]
+
+    parser = argparse.ArgumentParser(
+        description="git filter process updating copyrights as files are added"
+    )
+    parser.add_argument(
+        "--copyright-name",
+        type=str,
+        required=True,
+        help="The complete name used in the copyright assignment. The tool assumes that the line ends after this text.",
+    )  # noqa
+    parser.add_argument(
+        "--old-copyright",
+        type=str,
+        help="Also replace this name with --copyright-name.",
+    )
+    parser.add_argument(
+        "--skip-comment-check-for",
+        type=str,
+        action="append",
+        default=[],
+        help="Takes a standard shell glob such as '*.md'. Remember to use single quotes around the glob so the shell does not consume them. Can be repeated as needed.",
+    )  # noqa
+    parser.add_argument(
+        "--year", type=int, help="Use this <year> instead of current year."
+    )
+    parser.add_argument("--verbose", action="store_true", default=False)
+    args = parser.parse_args(args)
+
+    if args.year is None:
+        year = datetime.now().year
+    else:
+        year = args.year
+
+    header_filter = HeaderFilter(
+        args.copyright_name,
+        year,
+        old_copyright_name=args.old_copyright,
+        skip_comment_check_for=args.skip_comment_check_for,
+    )
+    process = FilterProcess(
+        header_filter, sys.stdin.buffer, sys.stdout.buffer, verbose=args.verbose
+    )
+    process.serve()
+
+
+if __name__ == "__main__":
+    main()
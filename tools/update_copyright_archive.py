@@ -0,0 +1,307 @@
+#!/usr/bin/env python
+
+import copy
+from datetime import datetime
+import io
+import shutil
+import struct
+import tarfile
+import zipfile
+
+from update_copyright_year import HEADER_LINES
+from update_copyright_year import UpdateCopyright
+from update_copyright_year import should_skip
+
+
+# Header lines longer than this are not treated as text
+MAX_LINE_LENGTH = 64 * 1024
+
+COPY_CHUNK_SIZE = 1024 * 1024
+
+_ZIP_LOCAL_HEADER = struct.Struct("<4s5H3L2H")
+_ZIP_ENCRYPTED = 0x01
+_ZIP_DATA_DESCRIPTOR = 0x08
+_ZIP_DESCRIPTOR_SIGNATURE = b"PK\x07\x08"
+_ZIP64_EXTRA = 1
+
+
+class PrefixedReader(io.RawIOBase):
+    """Read prefix followed by whatever remains of fp"""
+
+    def __init__(self, prefix, fp):
+        self._prefix = memoryview(prefix)
+        self._fp = fp
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        if self._prefix:
+            count = min(len(buffer), len(self._prefix))
+            buffer[:count] = self._prefix[:count]
+            self._prefix = self._prefix[count:]
+            return count
+
+        data = self._fp.read(len(buffer))
+        buffer[: len(data)] = data
+        return len(data)
+
+
+def read_header(fp):
+    """Read the lines of fp the copyright is searched in"""
+    lines = []
+    for _ in range(HEADER_LINES):
+        if not (line := fp.readline(MAX_LINE_LENGTH)):
+            break  # EOF
+        lines.append(line)
+
+    return b"".join(lines)
+
+
+def _strip_zip64_extra(extra):
+    """Drop the zip64 field, FileHeader adds a new one if needed"""
+    fields = []
+    pos = 0
+    while pos + 4 <= len(extra):
+        field_id, size = struct.unpack_from("<HH", extra, pos)
+        if field_id != _ZIP64_EXTRA:
+            fields.append(extra[pos : pos + 4 + size])
+        pos += 4 + size
+
+    return b"".join(fields)
+
+
+class UpdateArchive:
+    """Update copyright headers inside tar and zip archives.
+
+    Members are processed one at a time. Only the header of each member is
+    held in memory and the rest is streamed into the new archive.
+    """
+
+    def __init__(self, copyright_name, year, include=["*"], skip_comment_check_for=[]):
+        self._tool = UpdateCopyright(copyright_name, year)
+        self._include = include
+        self._skip_comment_check_for = skip_comment_check_for
+
+    def _update(self, name, fp):
+        """Return the header read from fp and its replacement, if any"""
+        header = read_header(fp)
+        return header, self._tool.update_header(name, header, self._skip_comment_check_for)
+
+    def _wanted(self, name):
+        return should_skip(self._include, name)
+
+    def needs_updating(self, source):
+        """Yield the names of the members which would be updated"""
+        if zipfile.is_zipfile(source):
+            with zipfile.ZipFile(source) as zin:
+                for info in zin.infolist():
+                    if self._zip_wanted(info):
+                        with zin.open(info) as fp:
+                            if self._update(info.filename, fp)[1] is not None:
+                                yield info.filename
+            return
+
+        with tarfile.open(source, "r|*") as tin:
+            for member in tin:
+                if member.isfile() and self._wanted(member.name):
+                    if self._update(member.name, tin.extractfile(member))[1] is not None:
+                        yield member.name
+
+    def update_tar(self, source, destination):
+        """Returns the names of the members updated"""
+        updated = []
+
+        mode = "w|"
+        for suffixes, compression in [
+            ((".tar.gz", ".tgz"), "gz"),
+            ((".tar.bz2", ".tbz2"), "bz2"),
+            ((".tar.xz", ".txz"), "xz"),
+        ]:
+            if destination.endswith(suffixes):
+                mode += compression
+
+        with tarfile.open(source, "r|*") as tin, tarfile.open(destination, mode) as tout:
+            for member in tin:
+                if not member.isfile():
+                    tout.addfile(member)
+                    continue
+
+                fp = tin.extractfile(member)
+                if not self._wanted(member.name):
+                    tout.addfile(member, fp)
+                    continue
+
+                header, new_header = self._update(member.name, fp)
+                if new_header is None:
+                    new_header = header
+                else:
+                    print(f"Updating {member.name}...")
+                    updated.append(member.name)
+                    member = copy.copy(member)
+                    member.size += len(new_header) - len(header)
+                    # tarfile writes a pax size record in preference to size
+                    member.pax_headers = {
+                        key: value
+                        for key, value in member.pax_headers.items()
+                        if key != "size"
+                    }
+
+                tout.addfile(member, io.BufferedReader(PrefixedReader(new_header, fp)))
+
+        return updated
+
+    def _copy_zip_member(self, source, zout, info):
+        """Copy the compressed data of a member as is"""
+        source.seek(info.header_offset)
+        fields = _ZIP_LOCAL_HEADER.unpack(source.read(_ZIP_LOCAL_HEADER.size))
+        if fields[0] != zipfile.stringFileHeader:
+            raise zipfile.BadZipFile(f"Bad local header for {info.filename}")
+        source.seek(fields[-2] + fields[-1], io.SEEK_CUR)  # name and extra
+
+        info = copy.copy(info)
+        # With bit 3 set ZipCrypto checks the password against the time
+        # rather than the CRC, so encrypted members keep their descriptor.
+        # Otherwise the sizes and CRC are known and it is not needed.
+        descriptor = info.flag_bits & _ZIP_ENCRYPTED and info.flag_bits & _ZIP_DATA_DESCRIPTOR
+        if not descriptor:
+            info.flag_bits &= ~_ZIP_DATA_DESCRIPTOR
+        info.extra = _strip_zip64_extra(info.extra)
+        info.header_offset = zout.fp.tell()
+
+        zout.fp.write(info.FileHeader())
+        remaining = info.compress_size
+        while remaining:
+            chunk = source.read(min(remaining, COPY_CHUNK_SIZE))
+            if not chunk:
+                raise zipfile.BadZipFile(f"Truncated data for {info.filename}")
+            zout.fp.write(chunk)
+            remaining -= len(chunk)
+
+        if descriptor:
+            zip64 = max(info.file_size, info.compress_size) > zipfile.ZIP64_LIMIT
+            zout.fp.write(
+                struct.pack(
+                    "<4sLQQ" if zip64 else "<4sLLL",
+                    _ZIP_DESCRIPTOR_SIGNATURE,
+                    info.CRC,
+                    info.compress_size,
+                    info.file_size,
+                )
+            )
+
+        zout.filelist.append(info)
+        zout.NameToInfo[info.filename] = info
+        zout.start_dir = zout.fp.tell()
+
+    def _zip_wanted(self, info):
+        encrypted = info.flag_bits & _ZIP_ENCRYPTED
+        return not (info.is_dir() or encrypted) and self._wanted(info.filename)
+
+    def update_zip(self, source, destination):
+        """Returns the names of the members updated"""
+        updated = []
+
+        with open(source, "rb") as raw, zipfile.ZipFile(source) as zin, zipfile.ZipFile(
+            destination, "w"
+        ) as zout:
+            zout.comment = zin.comment
+            for info in zin.infolist():
+                if not self._zip_wanted(info):
+                    self._copy_zip_member(raw, zout, info)
+                    continue
+
+                with zin.open(info) as src:
+                    header, new_header = self._update(info.filename, src)
+                    if new_header is None:
+                        self._copy_zip_member(raw, zout, info)
+                        continue
+
+                    print(f"Updating {info.filename}...")
+                    updated.append(info.filename)
+
+                    new_info = zipfile.ZipInfo(info.filename, info.date_time)
+                    new_info.compress_type = info.compress_type
+                    new_info.internal_attr = info.internal_attr
+                    new_info.external_attr = info.external_attr
+                    new_info.create_system = info.create_system
+                    new_info.create_version = info.create_version
+                    new_info.comment = info.comment
+                    new_info.extra = _strip_zip64_extra(info.extra)
+                    new_info.file_size = info.file_size + len(new_header) - len(header)
+
+                    with zout.open(new_info, "w") as dst:
+                        dst.write(new_header)
+                        shutil.copyfileobj(src, dst, COPY_CHUNK_SIZE)
+
+        return updated
+
+    def run(self, source, destination, dry_run=False):
+        if dry_run:
+            updated = list(self.needs_updating(source))
+            for name in updated:
+                print(f"Would update {name}")
+            return updated
+
+        if zipfile.is_zipfile(source):
+            return self.update_zip(source, destination)
+
+        return self.update_tar(source, destination)
+
+
+def main(args=None):
+    import argparse
+    import sys
+
+    if args is None:
+        args = sys.argv[1:]
+
+    parser = argparse.ArgumentParser(
+        description="Copyright date update tool for tar and zip archives"
+    )
+    parser.add_argument(
+        "--copyright-name",
+        type=str,
+        required=True,
+        help="The complete name used in the copyright assignment. The tool assumes that the line ends after this text.",
+    )  # noqa
+    parser.add_argument(
+        "--include",
+        type=str,
+        action="append",
+        help="Only update members matching this shell glob, such as '*.py'. Can be repeated as needed. Defaults to all members.",
+    )  # noqa
+    parser.add_argument(
+        "--skip-comment-check-for",
+        type=str,
+        action="append",
+        default=[],
+        help="Takes a standard shell glob such as '*.md'. Remember to use single quotes around the glob so the shell does not consume them. Can be repeated as needed.",
+    )  # noqa
+    parser.add_argument(
+        "--year", type=int, help="Use this <year> instead of current year."
+    )
+    parser.add_argument("--dry-run", action="store_true", default=False)
+    parser.add_argument("archive", help="The tar or zip archive to read.")
+    parser.add_argument(
+        "output",
+        help="Where to write the updated archive. A tar archive is compressed according to the extension.",
+    )  # noqa
+    args = parser.parse_args(args)
+
+    if args.year is None:
+        year = datetime.now().year
+    else:
+        year = args.year
+
+    tool = UpdateArchive(
+        args.copyright_name,
+        year,
+        include=args.include or ["*"],
+        skip_comment_check_for=args.skip_comment_check_for,
+    )
+    tool.run(args.archive, args.output, dry_run=args.dry_run)
+
+
+if __name__ == "__main__":
+    main()
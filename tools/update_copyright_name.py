@@ -1,7 +1,8 @@
 #!/usr/bin/env python
 
 from fnmatch import fnmatch
-import re
+
+from update_copyright_year import CopyrightParser
 
 
 class CopyrightedFile:
@@ -71,65 +72,29 @@ def should_skip(glob_list, filename):
 class UpdateCopyright:
     """Process files to remove 'company' from the copright"""
 
-    _commented_copyright_regex = r"""
-        ^
-        \s*
-        [#;]+                # Must be in a comment
-        \s*
-        (?:\(c\)|©)?         # Optional copyright symbol
-        \s*
-        Copyright:?          # Word 'copyright' with optional colon
-        \s+
-        (?:\(c\)|©)?         # Other location for optional copyright symbol
-        \s*
-        # Supports 1995 or 1995-1996 or 1995,1997 or a combination
-        (?P<years>(?:[0-9]+(?:\s*-\s*[0-9]+)?\s*,\s*)*(?:[0-9]+(?:\s*-\s*[0-9]+)?))
-        \s+
-        {OLD_COPYRIGHT_NAME} # Name to be replaced
-        \s*$
-    """  # noqa
-
-    _copyright_regex = r"""
-        ^
-        \s*
-        (?:\(c\)|©)?         # Optional copyright symbol
-        \s*
-        Copyright:?          # Word 'copyright' with optional colon
-        \s+
-        (?:\(c\)|©)?         # Other location for optional copyright symbol
-        \s*
-        # Supports 1995 or 1995-1996 or 1995,1997 or a combination
-        (?P<years>(?:[0-9]+(?:\s*-\s*[0-9]+)?\s*,\s*)*(?:[0-9]+(?:\s*-\s*[0-9]+)?))
-        \s+
-        {OLD_COPYRIGHT_NAME}     # Copyright holder's name
-        \s*$
-    """
-
     def __init__(self, old_copyright_name, new_copyright_name):
         self._old_name = old_copyright_name
         self._new_name = new_copyright_name
 
-        self._pat = re.compile(
-            self._copyright_regex.format(
-                OLD_COPYRIGHT_NAME=re.escape(old_copyright_name)
-            ),
-            re.VERBOSE | re.IGNORECASE,
-        )
-        self._commented_pat = re.compile(
-            self._commented_copyright_regex.format(
-                OLD_COPYRIGHT_NAME=re.escape(old_copyright_name)
-            ),
-            re.VERBOSE | re.IGNORECASE,
-        )
+        self._pat = CopyrightParser(old_copyright_name, commented=False)
+        self._commented_pat = CopyrightParser(old_copyright_name, commented=True)
+
+    def pattern_for(self, filename, skip_comment_check_for=[]):
+        if should_skip(skip_comment_check_for, filename):
+            return self._pat
+
+        return self._commented_pat
+
+    def rename_line(self, filename, line, skip_comment_check_for=[]):
+        """Return line with the new name, None if it holds no copyright"""
+        if self.pattern_for(filename, skip_comment_check_for).match(line):
+            return line.replace(self._old_name, self._new_name)
+
+        return None
 
     def run(self, files, skip_comment_check_for=[], dry_run=False, verbose=False):
         for filename in files:
-            pat = None
-            if should_skip(skip_comment_check_for, filename):
-                pat = self._pat
-            else:
-                pat = self._commented_pat
-
+            pat = self.pattern_for(filename, skip_comment_check_for)
             item = CopyrightedFile(
                 open(filename), pat, self._old_name, self._new_name, verbose=verbose
             )
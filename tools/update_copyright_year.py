@@ -1,9 +1,74 @@
 #!/usr/bin/env python
 
 
+import argparse
+import codecs
+import contextlib
 from datetime import datetime
+import difflib
 from fnmatch import fnmatch
+import hashlib
+import heapq
+import io
+import json
+import os
 import re
+import select
+import shutil
+import struct
+import tempfile
+import time
+
+
+# Only this many lines at the top of a file are searched for the copyright
+HEADER_LINES = 10
+
+# Lines of context around the change in patches
+PATCH_CONTEXT = 3
+
+# Outcomes of processing a file
+UPDATED = "updated"
+CURRENT = "current"
+MISSING = "missing"
+INSERTED = "inserted"
+SKIPPED = "skipped"
+
+# Comment markers for the files headers can be inserted into. Only '#' and
+# ';' are recognized as comments.
+COMMENT_STYLES = {
+    ".bash": "#",
+    ".cfg": "#",
+    ".conf": "#",
+    ".mk": "#",
+    ".pl": "#",
+    ".py": "#",
+    ".rb": "#",
+    ".sh": "#",
+    ".toml": "#",
+    ".yaml": "#",
+    ".yml": "#",
+    "Dockerfile": "#",
+    "Makefile": "#",
+    ".asm": ";",
+    ".ini": ";",
+    ".s": ";",
+    ".clj": ";;",
+    ".el": ";;",
+    ".lisp": ";;",
+    ".scm": ";;",
+}
+
+HEADER_TEMPLATES = {
+    None: "Copyright {year} {name}",
+    "#": "# Copyright {year} {name}",
+    ";": "; Copyright {year} {name}",
+    ";;": ";; Copyright {year} {name}",
+}
+
+# PEP 263, which also covers the Emacs and Vim forms
+_CODING_COOKIE = re.compile(rb"^[ \t\f]*#.*?coding[:=][ \t]*([-\w.]+)")
+
+COPY_CHUNK_SIZE = 1024 * 1024
 
 
 def copyright_years(years):
@@ -72,14 +137,252 @@ def insert_year(year, ranges):
     return True
 
 
+# Characters re.IGNORECASE treats as equal which upper/lower do not relate
+_EXTRA_FOLDS = {"\u1fd3": "\u0390", "\u1fe3": "\u03b0", "\ufb05": "\ufb06"}
+
+
+# Folds the same way as the reference regex, so it never rejects a line the
+# parser would accept
+_KEYWORD = re.compile("copyright", re.IGNORECASE)
+
+
+def _fold(ch):
+    folded = ch.upper().lower()
+    if len(folded) != 1:
+        folded = ch.lower()[:1]
+
+    return _EXTRA_FOLDS.get(folded, folded)
+
+
+def _equal_ignore_case(text, pos, expected):
+    if len(text) - pos < len(expected):
+        return False
+
+    chunk = text[pos : pos + len(expected)]
+    if chunk.isascii():
+        # ASCII characters fold to their lower case
+        return chunk.lower() == expected
+
+    return all(_fold(c) == e for c, e in zip(chunk, expected))
+
+
+def _skip_space(line, pos):
+    while pos < len(line) and line[pos].isspace():
+        pos += 1
+    return pos
+
+
+def _skip_digits(line, pos):
+    while pos < len(line) and line[pos] in "0123456789":
+        pos += 1
+    return pos
+
+
+def _skip_symbol(line, pos):
+    if line.startswith("©", pos):
+        return pos + 1
+    if _equal_ignore_case(line, pos, "(c)"):
+        return pos + 3
+    return pos
+
+
+class CopyrightMatch:
+    """Result of CopyrightParser.match.
+
+    Provides the subset of re.Match used by the tools. Group 1 is 'years'.
+    The 'comment' group holds the comment markers, if any.
+    """
+
+    def __init__(self, line, comment, years, holder):
+        self.string = line
+        self._spans = {
+            0: (0, len(line)),
+            1: years,
+            "years": years,
+            "holder": holder,
+            "comment": comment,
+        }
+
+    def span(self, group=0):
+        return self._spans[group]
+
+    def start(self, group=0):
+        return self._spans[group][0]
+
+    def end(self, group=0):
+        return self._spans[group][1]
+
+    def group(self, group=0):
+        start, end = self._spans[group]
+        return self.string[start:end]
+
+
+class CopyrightParser:
+    """Match copyright lines in a single left to right pass.
+
+    Accepts the same lines as UpdateCopyright._copyright_regex (or the
+    _commented_copyright_regex when commented is True) and selects the same
+    years, but runs in time linear in the length of the line no matter
+    what it contains. With no copyright_name any holder is accepted.
+    """
+
+    def __init__(self, copyright_name=None, commented=True):
+        self._name = None
+        if copyright_name is not None:
+            self._name = "".join(_fold(c) for c in copyright_name)
+        self._commented = commented
+
+    def _prefix(self, line):
+        """Return the span of the comment markers and the position of the
+        years, or None"""
+        pos = _skip_space(line, 0)
+        comment = (pos, pos)
+
+        if self._commented:
+            start = pos
+            while pos < len(line) and line[pos] in "#;":
+                pos += 1
+            if pos == start:
+                return None
+            comment = (start, pos)
+            pos = _skip_space(line, pos)
+
+        pos = _skip_space(line, _skip_symbol(line, pos))
+        if not _equal_ignore_case(line, pos, "copyright"):
+            return None
+        pos += len("copyright")
+        if line.startswith(":", pos):
+            pos += 1
+
+        start = pos
+        pos = _skip_space(line, pos)
+        if pos == start:
+            return None
+
+        return comment, _skip_space(line, _skip_symbol(line, pos))
+
+    def _year_ends(self, line, pos):
+        """Return every position the years could end at, in ascending order"""
+        ends = []
+
+        while True:
+            pos = _skip_digits(line, pos)
+            ends.append(pos)
+
+            after = _skip_space(line, pos)
+            if line.startswith("-", after):
+                digits = _skip_space(line, after + 1)
+                if (end := _skip_digits(line, digits)) > digits:
+                    ends.append(end)
+                    pos = end
+
+            after = _skip_space(line, pos)
+            if not line.startswith(",", after):
+                break
+            digits = _skip_space(line, after + 1)
+            if _skip_digits(line, digits) == digits:
+                break
+            pos = digits
+
+        return ends
+
+    def _holder(self, line, years_end, tail):
+        """Return the span of the holder following years_end, or None"""
+        holder = _skip_space(line, years_end)
+        if holder == years_end or holder >= tail:
+            return None
+
+        if self._name is None:
+            return holder, tail
+
+        # The name itself could start with whitespace
+        for start in range(years_end + 1, holder + 1):
+            end = start + len(self._name)
+            if end >= tail and _equal_ignore_case(line, start, self._name):
+                return start, end
+
+        return None
+
+    def match(self, line):
+        # Cheap rejection of the bulk of lines before any per-character work
+        if not _KEYWORD.search(line):
+            return None
+
+        if (prefix := self._prefix(line)) is None:
+            return None
+
+        comment, years = prefix
+        if _skip_digits(line, years) == years:
+            return None
+
+        tail = len(line.rstrip())
+
+        # Like the regex, prefer the longest list of years which leaves a
+        # valid holder. Each candidate examines a separate run of whitespace
+        # so this stays linear.
+        for years_end in reversed(self._year_ends(line, years)):
+            if holder := self._holder(line, years_end, tail):
+                return CopyrightMatch(line, comment, (years, years_end), holder)
+
+        return None
+
+
+def unified_diff(filename, original, updated, context=PATCH_CONTEXT, encoding="utf-8"):
+    """Return a patch for filename which 'git apply' accepts.
+
+    The patch is bytes. The lines of the file are encoded in encoding, the
+    one filename is stored in, so the patch matches the file byte for byte.
+    """
+    path = os.path.normpath(filename).replace(os.sep, "/")
+    diff = []
+    for index, line in enumerate(
+        difflib.unified_diff(
+            original, updated, fromfile=f"a/{path}", tofile=f"b/{path}", n=context
+        )
+    ):
+        if index < 2:
+            diff.append(os.fsencode(line))  # the ---/+++ lines hold the path
+        else:
+            diff.append(line.encode(encoding))
+        if not line.endswith("\n"):
+            diff.append(b"\n\\ No newline at end of file\n")
+
+    return b"".join(diff)
+
+
+def edit_header(header, edit):
+    """Let edit change the lines of header, the raw first lines of a file.
+
+    edit is given the list of decoded lines to change in place. Returns the
+    new header, or None when nothing changed or header is not UTF-8 text.
+    """
+    try:
+        text = header.decode("utf-8")
+    except UnicodeDecodeError:
+        return None  # binary or unknown encoding, leave it alone
+
+    lines = io.StringIO(text, newline="\n").readlines()
+    edit(lines)
+
+    updated = "".join(lines)
+    if updated == text:
+        return None
+
+    return updated.encode("utf-8")
+
+
 class CopyrightedFile:
-    def __init__(self, fp, pattern, year, verbose=False):
+    def __init__(self, fp, pattern, year, verbose=False, encoding=None):
         self._fp = fp
+        self._encoding = encoding
         self._pattern = pattern
         self._year = year
         self._verbose = verbose
         self._needs_updating = False
+        self._found = False
         self._lines = []
+        self._original = None
+        self._changed = None
 
     def _match_line(self, line):
         if match := self._pattern.match(line):
@@ -98,7 +401,12 @@ class CopyrightedFile:
 
         return ""
 
-    def process(self, filename):
+    def process(self, filename, patch_context=None):
+        """Search the header of the file for the copyright and update it.
+
+        With patch_context only that many lines following the copyright are
+        read, enough to produce a patch, rather than the whole file.
+        """
         if self._verbose:
             print(f"Processing: {filename}")
 
@@ -109,7 +417,7 @@ class CopyrightedFile:
         # break the call to read() later
 
         while True:
-            if self.lineno > 10:
+            if self.lineno > HEADER_LINES:
                 if self._verbose:
                     print("No copyright match")
                 break
@@ -122,40 +430,573 @@ class CopyrightedFile:
 
             self._lines.append(line)
             if result := self._process_line(line):
+                self._original = line
+                self._changed = len(self._lines) - 1
                 self._lines[-1] = result
                 self._needs_updating = True
+                self._found = True
                 break
             elif result is None:
                 continue  # no match, keep looking
             else:
+                self._found = True
                 break  # found but already up to date
 
         if self._needs_updating:
-            # only read the whole file if necessary
-            self._lines = "".join(self._lines)
-            self._lines += self._fp.read()
+            self._read_rest(patch_context)
         else:
             self._lines = []
 
         self._fp.close()
 
+    def _read_rest(self, patch_context=None):
+        if patch_context is not None:
+            for _ in range(patch_context):
+                if not (line := self._fp.readline()):
+                    break  # EOF
+                self._lines.append(line)
+        else:
+            # only read the whole file if necessary
+            self._lines = "".join(self._lines)
+            self._lines += self._fp.read()
+
     def update(self, filename, dry_run=False):
         if self._needs_updating:
             print(f"Writing {filename}...")
             if not dry_run:
-                with open(filename, "w") as fp:
+                with open(filename, "w", encoding=self._encoding) as fp:
                     fp.write(self._lines)
         else:
             print("No-op")
 
+        return self._needs_updating
+
+    def patch(self, filename, context=PATCH_CONTEXT):
+        """Return a unified diff of the change made by process()
+
+        process() must have been given a patch_context of at least context.
+        """
+        if not self._needs_updating:
+            return b""
+
+        changed = self._lines
+        original = changed[:]
+        original[self._changed] = self._original
+
+        return unified_diff(
+            filename,
+            original,
+            changed,
+            context=context,
+            encoding=self._encoding or "utf-8",
+        )
+
+    def outcome(self):
+        if self._needs_updating:
+            return UPDATED
+        elif self._found:
+            return CURRENT
+        return MISSING
+
 
 def should_skip(glob_list, filename):
     return any(fnmatch(filename, glob) for glob in glob_list)
 
 
+def stat_signature(filename):
+    try:
+        st = os.stat(filename)
+    except FileNotFoundError:
+        return None
+
+    return (st.st_mtime_ns, st.st_size)
+
+
+def walk_files(paths):
+    """Expand directories into the regular files below them.
+
+    Hidden directories such as .git are not descended into.
+    """
+    for path in paths:
+        if not os.path.isdir(path):
+            yield path
+            continue
+
+        for dirpath, dirnames, filenames in os.walk(path):
+            dirnames[:] = sorted(d for d in dirnames if not d.startswith("."))
+            for name in sorted(filenames):
+                yield os.path.join(dirpath, name)
+
+
+class PollingWatcher:
+    """Detect changes by comparing stat snapshots of the watched paths"""
+
+    def __init__(self, paths, interval=1.0):
+        self._paths = paths
+        self._interval = interval
+        self._snapshot = self._take_snapshot()
+
+    def _take_snapshot(self):
+        snapshot = {}
+        for filename in walk_files(self._paths):
+            if (signature := stat_signature(filename)) is not None:
+                snapshot[filename] = signature
+
+        return snapshot
+
+    def changes(self, timeout=None):
+        deadline = None if timeout is None else time.monotonic() + timeout
+
+        while True:
+            if deadline is None:
+                time.sleep(self._interval)
+            else:
+                time.sleep(max(0, min(self._interval, deadline - time.monotonic())))
+
+            current = self._take_snapshot()
+            changed = {
+                filename
+                for filename, signature in current.items()
+                if self._snapshot.get(filename) != signature
+            }
+            self._snapshot = current
+
+            if changed or (deadline is not None and time.monotonic() >= deadline):
+                return changed
+
+
+class InotifyWatcher:
+    """Receive file events from the Linux kernel via inotify"""
+
+    IN_CLOSE_WRITE = 0x00000008
+    IN_MOVED_TO = 0x00000080
+    IN_CREATE = 0x00000100
+    IN_Q_OVERFLOW = 0x00004000
+    IN_ISDIR = 0x40000000
+    IN_NONBLOCK = 0x00000800
+    IN_CLOEXEC = 0x00080000
+
+    _event = struct.Struct("iIII")
+
+    def __init__(self, paths):
+        import ctypes
+        import ctypes.util
+
+        self._libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        # raises AttributeError on platforms without inotify
+        self._fd = self._libc.inotify_init1(self.IN_NONBLOCK | self.IN_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+
+        self._paths = paths
+        self._dirs = {}
+        # None means every file in the directory is of interest
+        self._files = {}
+
+        self._add_watches()
+
+    def close(self):
+        os.close(self._fd)
+
+    def _add_watches(self):
+        for path in self._paths:
+            if os.path.isdir(path):
+                for dirpath, dirnames, _ in os.walk(path):
+                    dirnames[:] = [d for d in dirnames if not d.startswith(".")]
+                    self._add_watch(dirpath, None)
+            else:
+                self._add_watch(os.path.dirname(path) or ".", os.path.basename(path))
+
+    def _add_watch(self, dirpath, name):
+        mask = self.IN_CLOSE_WRITE | self.IN_MOVED_TO | self.IN_CREATE
+        wd = self._libc.inotify_add_watch(self._fd, os.fsencode(dirpath), mask)
+        if wd < 0:
+            raise OSError(f"Unable to watch {dirpath}")
+
+        self._dirs[wd] = dirpath
+        if name is None:
+            self._files[wd] = None
+        elif self._files.get(wd, set()) is not None:
+            self._files.setdefault(wd, set()).add(name)
+
+    def changes(self, timeout=None):
+        readable, _, _ = select.select([self._fd], [], [], timeout)
+        if not readable:
+            return set()
+
+        changed = set()
+        data = os.read(self._fd, 64 * 1024)
+        pos = 0
+        while pos < len(data):
+            wd, mask, _, length = self._event.unpack_from(data, pos)
+            pos += self._event.size
+            name = os.fsdecode(data[pos : pos + length].rstrip(b"\0"))
+            pos += length
+
+            if mask & self.IN_Q_OVERFLOW:
+                # events were dropped, so anything may have changed. Pick up
+                # directories created meanwhile and report every file.
+                self._add_watches()
+                changed.update(walk_files(self._paths))
+                continue
+
+            wanted = self._files.get(wd, set())
+            if wanted is not None and name not in wanted:
+                continue
+
+            path = os.path.join(self._dirs[wd], name)
+            if mask & self.IN_ISDIR:
+                if mask & (self.IN_CREATE | self.IN_MOVED_TO) and not name.startswith("."):
+                    self._add_watch(path, None)
+            elif mask & (self.IN_CLOSE_WRITE | self.IN_MOVED_TO):
+                changed.add(path)
+
+        return changed
+
+
+def make_watcher(paths, poll=False):
+    if not poll:
+        try:
+            return InotifyWatcher(paths)
+        except (AttributeError, OSError):
+            pass  # not Linux, or out of watches. Fall back to polling.
+
+    return PollingWatcher(paths)
+
+
+def path_hash(filename):
+    """Hash of the path which is the same on every machine and run"""
+    digest = hashlib.sha1(os.fsencode(os.path.normpath(filename))).digest()
+    return int.from_bytes(digest[:8], "big")
+
+
+def select_shard(files, index, count, balance="hash"):
+    """Return the files belonging to shard index of count.
+
+    Every file lands in exactly one shard as long as each node is given the
+    same list of files. With balance="size" files are assigned largest first
+    to the shard with the fewest bytes so far, evening out the amount of
+    data each node reads.
+    """
+    if balance == "size":
+        sizes = {filename: os.path.getsize(filename) for filename in files}
+        loads = [(0, shard) for shard in range(count)]
+        selected = set()
+        for filename in sorted(files, key=lambda f: (-sizes[f], path_hash(f), f)):
+            load, shard = heapq.heappop(loads)
+            heapq.heappush(loads, (load + sizes[filename], shard))
+            if shard == index:
+                selected.add(filename)
+
+        return [filename for filename in files if filename in selected]
+
+    return [filename for filename in files if path_hash(filename) % count == index]
+
+
+def shard_spec(value):
+    """Parse INDEX/COUNT as given to --shard"""
+    try:
+        index, count = (int(s) for s in value.split("/"))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected INDEX/COUNT, not {value!r}")
+
+    if count < 1 or not 0 <= index < count:
+        raise argparse.ArgumentTypeError(f"shard index must be between 0 and {count - 1}")
+
+    return index, count
+
+
+def write_report(filename, results, shard=None, dry_run=False):
+    report = {
+        "shard": list(shard or (0, 1)),
+        "dry_run": dry_run,
+        "results": results,
+    }
+    with open(filename, "w") as fp:
+        json.dump(report, fp, indent=1, sort_keys=True)
+
+
+def merge_reports(filenames):
+    """Combine the reports written by each shard of a run.
+
+    Returns the outcome counts and a list of problems: shards which did not
+    report, files which could not be read and files a dry run found needing
+    an update.
+    """
+    counts = {UPDATED: 0, INSERTED: 0, CURRENT: 0, MISSING: 0, SKIPPED: 0}
+    problems = []
+    seen = {}
+    expected = None
+
+    for filename in filenames:
+        with open(filename) as fp:
+            report = json.load(fp)
+
+        index, count = report["shard"]
+        if expected is None:
+            expected = count
+        elif count != expected:
+            problems.append(f"{filename}: shard {index}/{count} is from a {count} way split")
+        if index in seen:
+            problems.append(f"{filename}: shard {index} was already reported by {seen[index]}")
+        seen[index] = filename
+
+        for path, outcome in sorted(report["results"].items()):
+            counts[outcome] += 1
+            if report["dry_run"] and outcome in (UPDATED, INSERTED):
+                problems.append(f"{path}: needs updating")
+            elif outcome == SKIPPED:
+                problems.append(f"{path}: could not be read")
+
+    for index in range(expected or 0):
+        if index not in seen:
+            problems.append(f"shard {index}/{expected} did not report")
+
+    return counts, problems
+
+
+def comment_style(filename):
+    """Return the comment marker used by filename, None if unknown"""
+    name = os.path.basename(filename)
+    if name in COMMENT_STYLES:
+        return COMMENT_STYLES[name]
+
+    return COMMENT_STYLES.get(os.path.splitext(name)[1])
+
+
+def read_preamble(fp):
+    """Read the lines a header has to follow: a shebang and an encoding
+    cookie. Returns the preamble, the newline used by the file and the
+    encoding declared, if any. fp must be a binary file."""
+    preamble = b""
+    newline = b"\n"
+    encoding = None
+
+    for lineno in range(2):
+        start = fp.tell()
+        line = fp.readline(COPY_CHUNK_SIZE)
+        if lineno == 0 and line.endswith(b"\r\n"):
+            newline = b"\r\n"
+
+        if lineno == 0 and line.startswith(b"#!"):
+            preamble += line
+        elif match := _CODING_COOKIE.match(line):
+            preamble += line
+            encoding = match.group(1).decode("ascii")
+        else:
+            fp.seek(start)
+            break
+
+    return preamble, newline, encoding
+
+
+def source_encoding(filename):
+    """Return the encoding declared by the coding cookie of filename, if any.
+
+    Coding cookies are only honoured in Python sources. Elsewhere a comment
+    such as "# encoding: ascii (keys only)" is just a comment.
+    """
+    with open(filename, "rb") as fp:
+        preamble, _, encoding = read_preamble(fp)
+
+    shebang = preamble.partition(b"\n")[0] if preamble.startswith(b"#!") else b""
+    if not (filename.endswith((".py", ".pyw")) or b"python" in shebang):
+        return None
+
+    try:
+        return encoding and codecs.lookup(encoding).name
+    except LookupError:
+        return None  # unknown to Python, read it like any other file
+
+
+def copy_rest(src, dst):
+    """Copy src from its current position to dst, in the kernel when possible"""
+    offset = src.tell()
+    dst.flush()
+
+    try:
+        while copied := os.copy_file_range(src.fileno(), dst.fileno(), COPY_CHUNK_SIZE, offset):
+            offset += copied
+        return
+    except (AttributeError, OSError):
+        pass  # not Linux, or not supported between these filesystems
+
+    src.seek(offset)
+    while chunk := src.read(COPY_CHUNK_SIZE):
+        dst.write(chunk)
+
+
+def prepend_header(filename, header):
+    """Insert header after the preamble of filename.
+
+    The file is streamed into a temporary file next to it which then
+    replaces it, so it is never read into memory in full.
+    """
+    encoding = source_encoding(filename) or "utf-8"
+    with open(filename, "rb") as src:
+        preamble, newline, _ = read_preamble(src)
+        if preamble and not preamble.endswith(b"\n"):
+            preamble += newline
+
+        data = (header + "\n").encode(encoding).replace(b"\n", newline)
+
+        fd, tmp = tempfile.mkstemp(
+            dir=os.path.dirname(filename) or ".", prefix=".copyright-", suffix=".tmp"
+        )
+        try:
+            with os.fdopen(fd, "wb") as dst:
+                dst.write(preamble)
+                dst.write(data)
+                copy_rest(src, dst)
+            shutil.copymode(filename, tmp)
+            os.replace(tmp, filename)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+
+
+def header_patch(filename, header, context=PATCH_CONTEXT):
+    """Return a unified diff inserting header the way prepend_header would"""
+    encoding = source_encoding(filename) or "utf-8"
+    with open(filename, "rb") as fp:
+        preamble, newline, _ = read_preamble(fp)
+        before = preamble.decode(encoding).splitlines(keepends=True)
+        after = [fp.readline(COPY_CHUNK_SIZE).decode(encoding) for _ in range(context)]
+
+    after = [line for line in after if line]
+    original = before + after
+    if before and not before[-1].endswith("\n"):
+        # prepend_header ends the preamble with a newline
+        before[-1] += newline.decode("ascii")
+    updated = before + [header + newline.decode("ascii")] + after
+
+    return unified_diff(filename, original, updated, context=context, encoding=encoding)
+
+
+class Journal:
+    """Append only record of the files a run has finished.
+
+    The first line holds the mode of the run, as a dry run or one emitting
+    a patch leaves files untouched. Each further line holds the outcome,
+    the stat signature of the file once done with and the path. When
+    resuming, files whose signature still matches are not processed again.
+    """
+
+    FLUSH_EVERY = 100  # records
+    FLUSH_INTERVAL = 1.0  # seconds
+
+    def __init__(self, filename, resume=False, mode="write"):
+        recorded = self.load_mode(filename) if resume else None
+        if recorded is not None and recorded != mode:
+            raise ValueError(
+                f"{filename} was recorded by a '{recorded}' run, not '{mode}'"
+            )
+
+        self._completed = self.load(filename) if resume else {}
+        self._fp = open(filename, "a" if resume else "w")
+        if resume and not self._ends_with_newline(filename):
+            # finish the record cut short so the next one stays intact
+            self._fp.write("\n")
+        if recorded is None:
+            self._fp.write(f"mode {mode}\n")
+        self._pending = 0
+        self._last_flush = time.monotonic()
+
+    @staticmethod
+    def mode_for(dry_run=False, patch=False, insert_missing=False):
+        """Describe the options which decide what a run does to files"""
+        options = [
+            option
+            for option, enabled in [
+                ("dry-run", dry_run),
+                ("emit-patch", patch),
+                ("insert-missing", insert_missing),
+            ]
+            if enabled
+        ]
+        return " ".join(options) or "write"
+
+    @staticmethod
+    def load_mode(filename):
+        """Return the mode recorded in the journal, None if there is none"""
+        try:
+            with open(filename) as fp:
+                for line in fp:
+                    if line.startswith("mode ") and line.endswith("\n"):
+                        return line[len("mode ") : -1]
+        except FileNotFoundError:
+            pass
+
+        return None
+
+    @staticmethod
+    def _ends_with_newline(filename):
+        with open(filename, "rb") as fp:
+            if fp.seek(0, os.SEEK_END) == 0:
+                return True
+            fp.seek(-1, os.SEEK_END)
+            return fp.read(1) == b"\n"
+
+    @staticmethod
+    def load(filename):
+        completed = {}
+        try:
+            with open(filename) as fp:
+                for line in fp:
+                    if line.startswith("mode "):
+                        continue
+                    try:
+                        outcome, mtime_ns, size, path = line.split(" ", 3)
+                        completed[json.loads(path)] = (outcome, (int(mtime_ns), int(size)))
+                    except ValueError:
+                        continue  # cut short when the previous run was killed
+        except FileNotFoundError:
+            pass
+
+        return completed
+
+    def completed(self, filename):
+        """Return the recorded outcome if filename is finished and unchanged"""
+        if (record := self._completed.get(filename)) is None:
+            return None
+
+        outcome, signature = record
+        if stat_signature(filename) != signature:
+            return None
+
+        return outcome
+
+    def record(self, filename, outcome):
+        if (signature := stat_signature(filename)) is None:
+            return
+
+        mtime_ns, size = signature
+        self._fp.write(f"{outcome} {mtime_ns} {size} {json.dumps(filename)}\n")
+        self._pending += 1
+
+        if (
+            self._pending >= self.FLUSH_EVERY
+            or time.monotonic() - self._last_flush >= self.FLUSH_INTERVAL
+        ):
+            self.flush()
+
+    def flush(self):
+        self._fp.flush()
+        os.fsync(self._fp.fileno())
+        self._pending = 0
+        self._last_flush = time.monotonic()
+
+    def close(self):
+        self.flush()
+        self._fp.close()
+
+
 class UpdateCopyright:
     """Process files to update their copyright dates"""
 
+    # The grammar matched by CopyrightParser. Kept as the reference the
+    # parser is tested against.
+
     _commented_copyright_regex = r"""
         ^
         \s*
@@ -191,34 +1032,339 @@ class UpdateCopyright:
     """  # noqa
 
     def __init__(self, copyright_name, year):
+        self._name = copyright_name
         self._year = year
 
-        self._pat = re.compile(
-            self._copyright_regex.format(COPYRIGHT_NAME=re.escape(copyright_name)),
+        self._pat = CopyrightParser(copyright_name, commented=False)
+        self._commented_pat = CopyrightParser(copyright_name, commented=True)
+
+    @classmethod
+    def compile_regex(cls, copyright_name, commented=True):
+        """Compile the reference regex matched by CopyrightParser"""
+        regex = cls._commented_copyright_regex if commented else cls._copyright_regex
+        return re.compile(
+            regex.format(COPYRIGHT_NAME=re.escape(copyright_name)),
             re.VERBOSE | re.IGNORECASE,
         )
-        self._commented_pat = re.compile(
-            self._commented_copyright_regex.format(
-                COPYRIGHT_NAME=re.escape(copyright_name)
-            ),  # noqa
-            re.VERBOSE | re.IGNORECASE,
+
+    def pattern_for(self, filename, skip_comment_check_for=[]):
+        if should_skip(skip_comment_check_for, filename):
+            return self._pat
+
+        return self._commented_pat
+
+    def update_line(self, filename, line, skip_comment_check_for=[]):
+        """Add the year to the copyright on line.
+
+        Returns the new line, "" when the copyright is already up to date or
+        None when line holds no copyright.
+        """
+        pat = self.pattern_for(filename, skip_comment_check_for)
+        return CopyrightedFile(None, pat, self._year)._process_line(line)
+
+    def update_lines(self, filename, lines, skip_comment_check_for=[]):
+        """Add the year to the first copyright in lines, a list of the
+        lines of filename which is changed in place"""
+        for pos, line in enumerate(lines):
+            result = self.update_line(filename, line, skip_comment_check_for)
+            if result:
+                lines[pos] = result
+                break
+            elif result is not None:
+                break  # found but already up to date
+
+    def update_header(self, filename, header, skip_comment_check_for=[]):
+        """Update the copyright in header, the raw first lines of filename.
+
+        Returns the new header, or None when there is nothing to change or
+        header is not UTF-8 text.
+        """
+        return edit_header(
+            header, lambda lines: self.update_lines(filename, lines, skip_comment_check_for)
         )
 
-    def run(self, files, skip_comment_check_for=[], dry_run=False, verbose=False):
-        for filename in files:
-            pat = None
-            if should_skip(skip_comment_check_for, filename):
-                pat = self._pat
-            else:
-                pat = self._commented_pat
+    def header_for(self, filename, skip_comment_check_for=[]):
+        """Return the header to insert into filename, None if the comment
+        style is not known"""
+        if should_skip(skip_comment_check_for, filename):
+            style = None
+        elif (style := comment_style(filename)) is None:
+            return None
+
+        return HEADER_TEMPLATES[style].format(year=self._year, name=self._name)
 
-            item = CopyrightedFile(open(filename), pat, self._year, verbose=verbose)
+    def _has_copyright(self, filename, skip_comment_check_for=[]):
+        """Check the header of filename for a copyright held by anyone"""
+        parser = CopyrightParser(
+            commented=not should_skip(skip_comment_check_for, filename)
+        )
+
+        encoding = source_encoding(filename)
+        with open(filename, encoding=encoding, errors="replace") as fp:
+            for _ in range(HEADER_LINES):
+                if not (line := fp.readline(COPY_CHUNK_SIZE)):
+                    break  # EOF
+                if parser.match(line):
+                    return True
+
+        return False
+
+    def insert_header(
+        self, filename, skip_comment_check_for=[], dry_run=False, patch=None
+    ):
+        """Add a copyright header to filename. Returns the outcome."""
+        header = self.header_for(filename, skip_comment_check_for)
+        if header is None:
+            print(f"No comment style known for {filename}")
+            return MISSING
+
+        if self._has_copyright(filename, skip_comment_check_for):
+            print(f"{filename} has a copyright for someone else")
+            return MISSING
+
+        if patch is not None:
+            print(f"Patching {filename}...")
+            patch.write(header_patch(filename, header))
+            patch.flush()
+        else:
+            print(f"Inserting header into {filename}...")
+            if not dry_run:
+                prepend_header(filename, header)
+
+        return INSERTED
+
+    def update_file(
+        self,
+        filename,
+        skip_comment_check_for=[],
+        dry_run=False,
+        verbose=False,
+        patch=None,
+        insert_missing=False,
+    ):
+        """Update filename, or with patch write the change to that binary
+        file object as a unified diff instead. With insert_missing a header
+        is added to files which have none."""
+        pat = self.pattern_for(filename, skip_comment_check_for)
+        encoding = source_encoding(filename)
+
+        if patch is None:
+            item = CopyrightedFile(
+                open(filename, encoding=encoding),
+                pat,
+                self._year,
+                verbose=verbose,
+                encoding=encoding,
+            )
             item.process(filename)
-            item.update(filename, dry_run=dry_run)
+            if not insert_missing or item.outcome() != MISSING:
+                item.update(filename, dry_run=dry_run)
+        else:
+            # keep line endings as they are so the patch applies
+            fp = open(filename, newline="", encoding=encoding)
+            item = CopyrightedFile(fp, pat, self._year, verbose=verbose, encoding=fp.encoding)
+            item.process(filename, patch_context=PATCH_CONTEXT)
+            if diff := item.patch(filename):
+                print(f"Patching {filename}...")
+                patch.write(diff)
+                patch.flush()
+            elif not insert_missing or item.outcome() != MISSING:
+                print("No-op")
+
+        if insert_missing and item.outcome() == MISSING:
+            return self.insert_header(
+                filename,
+                skip_comment_check_for=skip_comment_check_for,
+                dry_run=dry_run,
+                patch=patch,
+            )
+
+        return item.outcome()
+
+    def run(
+        self,
+        files,
+        skip_comment_check_for=[],
+        dry_run=False,
+        verbose=False,
+        shard=None,
+        balance="hash",
+        journal=None,
+        patch=None,
+        insert_missing=False,
+    ):
+        """Update files, returning the outcome for each file processed.
+
+        shard is an (index, count) tuple restricting the run to that part
+        of files. See select_shard. Finished files are recorded in the
+        journal, and files it already holds are skipped. With patch the
+        changes are written to that binary file object as a patch and the
+        files are left alone.
+        """
+        if shard is not None:
+            files = select_shard(files, *shard, balance=balance)
+
+        results = {}
+        for filename in files:
+            if journal is not None and (outcome := journal.completed(filename)):
+                if verbose:
+                    print(f"Already done: {filename}")
+                results[filename] = outcome
+                continue
+
+            try:
+                results[filename] = self.update_file(
+                    filename,
+                    skip_comment_check_for=skip_comment_check_for,
+                    dry_run=dry_run,
+                    verbose=verbose,
+                    patch=patch,
+                    insert_missing=insert_missing,
+                )
+            except UnicodeDecodeError as e:
+                print(f"Skipping {filename}: {e}")
+                results[filename] = SKIPPED
+                continue  # not finished, a resumed run tries again
+
+            if journal is not None:
+                journal.record(filename, results[filename])
+
+        return results
+
+    def process_changes(
+        self, paths, seen, skip_comment_check_for=[], dry_run=False, verbose=False
+    ):
+        """Update the files in paths which changed since they were last seen.
+
+        seen maps a path to the stat signature recorded the last time it was
+        processed. Files we rewrote are recorded after the write so the event
+        caused by our own write is ignored instead of looping.
+        """
+        for filename in sorted(paths):
+            try:
+                signature = stat_signature(filename)
+                if signature is None or seen.get(filename) == signature:
+                    continue
+
+                self.update_file(
+                    filename,
+                    skip_comment_check_for=skip_comment_check_for,
+                    dry_run=dry_run,
+                    verbose=verbose,
+                )
+                seen[filename] = stat_signature(filename)
+            except (OSError, UnicodeDecodeError) as e:
+                print(f"Skipping {filename}: {e}")
+
+    def watch(
+        self,
+        paths,
+        skip_comment_check_for=[],
+        dry_run=False,
+        verbose=False,
+        debounce=0.5,
+        poll=False,
+    ):
+        watcher = make_watcher(paths, poll=poll)
+        seen = {}
+
+        if verbose:
+            print(f"Watching {len(paths)} path(s) with {type(watcher).__name__}")
+
+        while True:
+            changed = watcher.changes(timeout=None)
+            # Let a burst of events (editor saves, checkouts) settle first
+            while more := watcher.changes(timeout=debounce):
+                changed |= more
+
+            self.process_changes(
+                changed,
+                seen,
+                skip_comment_check_for=skip_comment_check_for,
+                dry_run=dry_run,
+                verbose=verbose,
+            )
+
+
+def report_summary(filenames):
+    """Print the merged reports, returning the exit status"""
+    counts, problems = merge_reports(filenames)
+    for problem in problems:
+        print(problem)
+    print(", ".join(f"{count} {outcome}" for outcome, count in counts.items()))
+
+    return 1 if problems else 0
+
+
+def check_args(parser, args):
+    """Reject combinations of options which cannot work together"""
+    if args.copyright_name is None:
+        parser.error("--copyright-name is required")
+    if args.resume and args.journal is None:
+        parser.error("--resume requires --journal")
+    if args.resume and args.emit_patch:
+        # the earlier patch cannot be extended safely, a file emitted just
+        # before the run was killed may not have reached the journal
+        parser.error("--resume cannot be combined with --emit-patch")
+    if args.resume:
+        recorded = Journal.load_mode(args.journal)
+        if recorded not in (None, journal_mode(args)):
+            parser.error(f"--resume of a '{recorded}' journal needs the same options")
+    if args.watch:
+        # watching only updates existing headers in place
+        for option in ("journal", "emit_patch", "insert_missing"):
+            if getattr(args, option):
+                parser.error(f"--watch cannot be combined with --{option.replace('_', '-')}")
+
+
+def journal_mode(args):
+    return Journal.mode_for(
+        dry_run=args.dry_run,
+        patch=bool(args.emit_patch),
+        insert_missing=args.insert_missing,
+    )
+
+
+def run_from_args(tool, args):
+    import sys
+
+    journal = None
+    if args.journal:
+        journal = Journal(args.journal, resume=args.resume, mode=journal_mode(args))
+
+    patch = None
+    output = contextlib.nullcontext()
+    if args.emit_patch == "-":
+        patch = sys.stdout.buffer
+        # keep the progress messages out of the patch
+        output = contextlib.redirect_stdout(sys.stderr)
+    elif args.emit_patch:
+        patch = open(args.emit_patch, "wb")
+
+    try:
+        with output:
+            results = tool.run(
+                args.files,
+                skip_comment_check_for=args.skip_comment_check_for,
+                dry_run=args.dry_run,
+                verbose=args.verbose,
+                shard=args.shard,
+                balance=args.shard_balance,
+                journal=journal,
+                patch=patch,
+                insert_missing=args.insert_missing,
+            )
+    finally:
+        if journal is not None:
+            journal.close()
+        if patch is not None and patch is not sys.stdout.buffer:
+            patch.close()
+
+    if args.report:
+        write_report(args.report, results, shard=args.shard, dry_run=args.dry_run)
 
 
 def main(args=None):
-    import argparse
     import sys
 
     if args is None:
@@ -228,8 +1374,7 @@ def main(args=None):
     parser.add_argument(
         "--copyright-name",
         type=str,
-        required=True,
-        help="The complete name used in the copyright assignment. The tool assumes that the line ends after this text.",
+        help="The complete name used in the copyright assignment. The tool assumes that the line ends after this text. Required unless merging reports.",
     )  # noqa
     parser.add_argument(
         "--skip-comment-check-for",
@@ -243,21 +1388,97 @@ def main(args=None):
     )
     parser.add_argument("--dry-run", action="store_true", default=False)
     parser.add_argument("--verbose", action="store_true", default=False)
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        default=False,
+        help="Keep running and update files as they change. Directories are watched recursively.",
+    )  # noqa
+    parser.add_argument(
+        "--debounce",
+        type=float,
+        default=0.5,
+        help="Seconds to wait for a burst of changes to settle in --watch mode.",
+    )
+    parser.add_argument(
+        "--poll",
+        action="store_true",
+        default=False,
+        help="Use stat polling instead of inotify in --watch mode.",
+    )
+    parser.add_argument(
+        "--shard",
+        type=shard_spec,
+        help="Only process part INDEX/COUNT of the files, counting from 0. Each node in CI runs one part.",
+    )  # noqa
+    parser.add_argument(
+        "--shard-balance",
+        choices=["hash", "size"],
+        default="hash",
+        help="Split files by a hash of their path, or so each shard gets a similar number of bytes.",
+    )  # noqa
+    parser.add_argument(
+        "--report", type=str, help="Write the outcome for each file to this JSON file."
+    )
+    parser.add_argument(
+        "--merge-reports",
+        action="store_true",
+        default=False,
+        help="Combine the --report files given instead of processing files. Exits non-zero if a shard is missing or a dry run found files to update.",
+    )  # noqa
+    parser.add_argument(
+        "--journal",
+        type=str,
+        help="Record each finished file in this journal so an interrupted run can be resumed.",
+    )  # noqa
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        default=False,
+        help="Skip files the --journal lists as finished which have not changed since.",
+    )  # noqa
+    parser.add_argument(
+        "--emit-patch",
+        type=str,
+        metavar="FILE",
+        help="Write the changes as a patch to FILE, or stdout for '-', instead of modifying the files. Apply it with 'git apply'.",
+    )  # noqa
+    parser.add_argument(
+        "--insert-missing",
+        action="store_true",
+        default=False,
+        help="Add a copyright header to files without one. The comment style is chosen from the file extension.",
+    )  # noqa
     parser.add_argument("files", nargs="+")
     args = parser.parse_args()
 
+    if args.merge_reports:
+        sys.exit(report_summary(args.files))
+
+    check_args(parser, args)
+
     if args.year is None:
         year = datetime.now().year
     else:
         year = args.year
 
     tool = UpdateCopyright(copyright_name=args.copyright_name, year=year)
-    tool.run(
-        args.files,
-        skip_comment_check_for=args.skip_comment_check_for,
-        dry_run=args.dry_run,
-        verbose=args.verbose,
-    )
+
+    if args.watch:
+        try:
+            tool.watch(
+                args.files,
+                skip_comment_check_for=args.skip_comment_check_for,
+                dry_run=args.dry_run,
+                verbose=args.verbose,
+                debounce=args.debounce,
+                poll=args.poll,
+            )
+        except KeyboardInterrupt:
+            pass
+        return
+
+    run_from_args(tool, args)
 
 
 if __name__ == "__main__":